@@ -0,0 +1,306 @@
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, List
+
+import pandas as pd
+
+# One lock per manifest file, so concurrent team runs sharing a manifest do not
+# overwrite each other's entries.
+_manifest_locks: Dict[str, threading.Lock] = {}
+_manifest_locks_lock = threading.Lock()
+
+
+def manifest_lock(manifest_path: str) -> threading.Lock:
+    """
+    Returns the lock guarding the updates of a manifest file within this process.
+    """
+    key = os.path.normcase(os.path.abspath(manifest_path))
+    with _manifest_locks_lock:
+        return _manifest_locks.setdefault(key, threading.Lock())
+
+
+def file_hash(path: str) -> str:
+    """
+    Calculates the SHA-256 hash of a file's content.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        str: The hex digest of the content.
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def load_manifest(manifest_path: str) -> List[dict]:
+    """
+    Loads the archive manifest. A missing manifest is treated as an empty archive.
+
+    Args:
+        manifest_path (str): The path of the manifest file.
+
+    Returns:
+        List[dict]: One entry per archived file.
+    """
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_path: str, entries: List[dict]) -> None:
+    """
+    Writes the archive manifest. The file is replaced atomically so an aborted run
+    cannot leave a truncated manifest behind.
+
+    Args:
+        manifest_path (str): The path of the manifest file.
+        entries (List[dict]): The entries to write.
+
+    Returns:
+        None
+    """
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="UTF-8") as f:
+        json.dump(entries, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def data_periods(df: pd.DataFrame) -> List[str]:
+    """
+    Returns the months covered by the data as sorted "YYYY-MM" strings.
+    """
+    return sorted(df["Zeitstempel"].dropna().dt.strftime("%Y-%m").unique().tolist())
+
+
+def archive_file(
+    t: datetime,
+    source: str,
+    input_file: str,
+    df: pd.DataFrame,
+    archive_dir: str,
+    manifest_path: str,
+    content_hash: str = None,
+) -> dict:
+    """
+    Moves an ingested file into the archive and records it in the manifest.
+
+    Files whose content is already archived for the same source are not stored a second
+    time; the input file is removed and the existing entry is returned. Next to the
+    original file a zstd-compressed Parquet copy of the parsed data is written, so
+    past months can be reloaded without parsing Excel again. `df` has to hold all rows
+    of the file, not only the months loaded into the database, as the manifest
+    records the periods and the row count of the whole file.
+
+    Args:
+        t (datetime): The timestamp of the run, used as file name prefix.
+        source (str): The source the file belongs to, e.g. "Mail Order".
+        input_file (str): The path of the ingested file.
+        df (pd.DataFrame): All parsed rows of the file.
+        archive_dir (str): The archive directory of the source.
+        manifest_path (str): The path of the manifest file.
+        content_hash (str, optional): The known hash of the file, calculated if missing.
+
+    Returns:
+        dict: The manifest entry of the file.
+    """
+    if content_hash is None:
+        content_hash = file_hash(input_file)
+    with manifest_lock(manifest_path):
+        entries = load_manifest(manifest_path)
+
+        for entry in entries:
+            if entry["hash"] == content_hash and entry["source"] == source:
+                os.remove(input_file)
+                logging.info(
+                    f"File {input_file} is already archived as {entry['file']}, removed input file"
+                )
+                return entry
+
+        os.makedirs(archive_dir, exist_ok=True)
+        base_name = t.strftime("%d_%m_%Y") + "_" + os.path.basename(input_file)
+        archive_path = os.path.join(archive_dir, base_name)
+        if os.path.exists(archive_path):
+            base, extension = os.path.splitext(archive_path)
+            archive_path = f"{base}_{content_hash[:12]}{extension}"
+        parquet_path = os.path.splitext(archive_path)[0] + ".parquet"
+
+        df.to_parquet(parquet_path, compression="zstd", index=False)
+        os.rename(input_file, archive_path)
+
+        entry = {
+            "hash": content_hash,
+            "source": source,
+            "file": archive_path,
+            "parquet": parquet_path,
+            "periods": data_periods(df),
+            "rows": len(df),
+            "archived": datetime.now().isoformat(timespec="seconds"),
+        }
+        entries.append(entry)
+        save_manifest(manifest_path, entries)
+    logging.info(f"Archived file {input_file} as {archive_path}")
+    return entry
+
+
+def skip_archived(
+    input_files: Dict[str, List[str]], manifest_path: str, hashes: Dict[str, str] = None
+) -> Dict[str, List[str]]:
+    """
+    Removes input files whose content is already archived for the same source.
+
+    This runs before anything is loaded, so a re-delivered file is not inserted into
+    the database a second time. Of identical files delivered together only the first
+    one is kept.
+
+    Args:
+        input_files (Dict[str, List[str]]): The input files per source.
+        manifest_path (str): The path of the manifest file.
+        hashes (Dict[str, str], optional): Known content hashes per file path.
+
+    Returns:
+        Dict[str, List[str]]: The remaining input files per source.
+    """
+    hashes = hashes or {}
+    archived = {
+        (entry["source"], entry["hash"]) for entry in load_manifest(manifest_path)
+    }
+    remaining = {}
+    for source, files in input_files.items():
+        seen = set()
+        remaining[source] = []
+        for input_file in files:
+            content_hash = hashes.get(input_file) or file_hash(input_file)
+            if (source, content_hash) in archived or content_hash in seen:
+                os.remove(input_file)
+                logging.info(
+                    f"File {input_file} has already been loaded, removed input file"
+                )
+                continue
+            seen.add(content_hash)
+            remaining[source].append(input_file)
+    return remaining
+
+
+def archive_files(
+    t: datetime,
+    sources: List[str],
+    input_files: Dict[str, List[str]],
+    archive_dirs: Dict[str, str],
+    frames: Dict[str, pd.DataFrame],
+    committed_periods: List[str],
+    manifest_path: str,
+    hashes: Dict[str, str] = None,
+) -> None:
+    """
+    Archives the input files of every source, see `archive_file`.
+
+    Only files whose months of the run's year up to the run's month are all in the
+    database are archived. Files holding such a month that could not be loaded yet,
+    e.g. because another source has no data for it, stay in the input directory for a
+    later run. Rows of other years or later months do not keep a file back, as this
+    run could never load them.
+
+    Args:
+        t (datetime): The timestamp of the run.
+        sources (List[str]): The sources to archive.
+        input_files (Dict[str, List[str]]): The ingested files per source.
+        archive_dirs (Dict[str, str]): The archive directory per source.
+        frames (Dict[str, pd.DataFrame]): All parsed rows per source, indexed by file
+            path in the first level as returned by the `read_*` functions without
+            selected months.
+        committed_periods (List[str]): The months in the database as "YYYY-MM".
+        manifest_path (str): The path of the manifest file.
+        hashes (Dict[str, str], optional): Known content hashes per file path.
+
+    Returns:
+        None
+    """
+    hashes = hashes or {}
+    for source in sources:
+        df = frames[source]
+        for input_file in input_files[source]:
+            try:
+                if input_file in df.index.get_level_values(0):
+                    df_file = df.xs(input_file, level=0)
+                else:
+                    df_file = df.iloc[0:0]
+                pending = [
+                    period
+                    for period in data_periods(df_file)
+                    if period.startswith(t.strftime("%Y-"))
+                    and period <= t.strftime("%Y-%m")
+                    and period not in committed_periods
+                ]
+                if pending:
+                    logging.info(
+                        f"File {input_file} holds months not loaded yet {pending}, left in input directory"
+                    )
+                    continue
+                archive_file(
+                    t,
+                    source,
+                    input_file,
+                    df_file,
+                    archive_dirs[source],
+                    manifest_path,
+                    hashes.get(input_file),
+                )
+            except Exception as e:
+                logging.error(f"Could not archive file {input_file}: {e}")
+                exit(1)
+
+
+def find_archived(source: str, period: str, manifest_path: str) -> List[dict]:
+    """
+    Looks up the archived files of a source that contain data of the given month.
+
+    Args:
+        source (str): The source, e.g. "Mail Order".
+        period (str): The month as "YYYY-MM".
+        manifest_path (str): The path of the manifest file.
+
+    Returns:
+        List[dict]: The matching manifest entries, oldest first.
+    """
+    return [
+        entry
+        for entry in load_manifest(manifest_path)
+        if entry["source"] == source and period in entry["periods"]
+    ]
+
+
+def load_archived(
+    source: str, period: str, manifest_path: str, arrow: bool = False
+) -> pd.DataFrame:
+    """
+    Reloads the data of a past month from the Parquet copies in the archive.
+
+    Args:
+        source (str): The source, e.g. "Mail Order".
+        period (str): The month as "YYYY-MM".
+        manifest_path (str): The path of the manifest file.
+        arrow (bool): Whether the columns should be backed by Apache Arrow.
+
+    Returns:
+        pd.DataFrame: The rows of the month, empty if nothing is archived.
+    """
+    entries = find_archived(source, period, manifest_path)
+    if not entries:
+        logging.info(f"No archived data for {source} in {period}")
+        return pd.DataFrame()
+
+    kwargs = {"dtype_backend": "pyarrow"} if arrow else {}
+    df = pd.concat(
+        [pd.read_parquet(entry["parquet"], **kwargs) for entry in entries],
+        ignore_index=True,
+    )
+    return df[df["Zeitstempel"].dt.strftime("%Y-%m") == period].reset_index(drop=True)
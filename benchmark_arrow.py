@@ -0,0 +1,87 @@
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from excel_interactions import (
+    read_mail_order,
+    read_mail_service,
+    read_correspondence,
+    read_vak,
+    to_arrow_table,
+)
+from database_interactions import _rows
+
+input_dirs = json.load(open("config.json", encoding="UTF-8"))["INPUT_DIRS"]
+file_names = json.load(open("config.json", encoding="UTF-8"))["FILE_NAMES"]
+
+readers = {
+    "Mail Order": read_mail_order,
+    "Mail Service": read_mail_service,
+    "Kunden Korrespondenz": read_correspondence,
+    "VAK": read_vak,
+}
+
+columns = {
+    "Mail Order": ["Zeitstempel", "Kunde", "Titel"],
+    "Mail Service": ["Zeitstempel", "Kunde", "Titel"],
+    "Kunden Korrespondenz": ["Zeitstempel", "Anzahl"],
+    "VAK": ["Zeitstempel", "Anzahl", "Durchschnitt"],
+}
+
+
+def run_pipeline(arrow: bool, months, output_dir: str) -> None:
+    """
+    Runs read -> Parquet -> database rows for all sources, without touching the database.
+    """
+    for source, reader in readers.items():
+        df = reader(input_dirs[source], file_names[source], months, arrow=arrow)
+        table = to_arrow_table(df)
+        pq.write_table(table, os.path.join(output_dir, source + ".parquet"))
+        _rows(df, columns[source])
+
+
+def benchmark(arrow: bool, months, repeat: int = 5) -> tuple:
+    """
+    Measures the best wall time and the peaks of allocated memory over `repeat` runs.
+
+    tracemalloc only sees allocations of the Python allocator, while Arrow buffers come
+    from Arrow's own memory pool, so both are reported. The pool's high-water mark
+    covers the whole process, so every backend has to be measured in a fresh process.
+
+    Returns:
+        tuple: The best time in seconds, the peak of Python allocations and the peak
+        of the Arrow memory pool, both in bytes.
+    """
+    pool = pa.default_memory_pool()
+    best, python_peak, arrow_peak = float("inf"), 0, 0
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            baseline = pool.bytes_allocated()
+            tracemalloc.start()
+            start = time.perf_counter()
+            run_pipeline(arrow, months, output_dir)
+            best = min(best, time.perf_counter() - start)
+            python_peak = max(python_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            arrow_peak = max(arrow_peak, pool.max_memory() - baseline)
+    return best, python_peak, arrow_peak
+
+
+if __name__ == "__main__":
+    months = list(range(1, 13))
+    for arrow in (False, True):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            seconds, python_peak, arrow_peak = executor.submit(
+                benchmark, arrow, months
+            ).result()
+        backend = "arrow" if arrow else "numpy"
+        print(
+            f"{backend:>6}: {seconds * 1000:8.1f} ms, peak python {python_peak / 2**20:8.2f} MiB"
+            f" + arrow pool {arrow_peak / 2**20:8.2f} MiB"
+        )
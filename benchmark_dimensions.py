@@ -0,0 +1,95 @@
+from datetime import datetime
+import argparse
+import time
+
+import pandas as pd
+
+from database_interactions import (
+    TABLES,
+    create_dimensions,
+    create_mail_normalized,
+    get_db,
+    normalized_table,
+    upsert_mail_normalized,
+)
+from excel_interactions import factorize_dimensions
+
+
+def populate(t: datetime, source: str) -> None:
+    """
+    Copies the denormalized rows of a year into the normalized fact table.
+    """
+    create_dimensions()
+    create_mail_normalized(t, source)
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    cursor.execute(
+        f"SELECT Zeitstempel, Kunde, Titel FROM {TABLES[source] + t.strftime('_%Y')}"
+    )
+    df = pd.DataFrame.from_records(
+        cursor.fetchall(), columns=["Zeitstempel", "Kunde", "Titel"]
+    )
+    cnxn.close()
+    df["Zeitstempel"] = pd.to_datetime(df["Zeitstempel"])
+    df_codes, uniques = factorize_dimensions(df)
+    upsert_mail_normalized(t, source, df_codes, uniques, list(range(1, 13)))
+
+
+def table_size(cursor, table_name: str) -> int:
+    """
+    Returns the reserved size of a table in KB as reported by sp_spaceused.
+    """
+    cursor.execute("EXEC sp_spaceused ?", table_name)
+    return int(cursor.fetchone()[2].split()[0])
+
+
+def best_time(cursor, sql: str, repeat: int) -> float:
+    """
+    Returns the best wall time of a query in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql)
+        cursor.fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare denormalized and normalized Mail Order / Mail Service tables"
+    )
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--source", default="Mail Order")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--populate",
+        action="store_true",
+        help="copy the denormalized rows into the normalized table first",
+    )
+    args = parser.parse_args()
+
+    t = datetime(args.year, 1, 1)
+    if args.populate:
+        populate(t, args.source)
+
+    denormalized = TABLES[args.source] + t.strftime("_%Y")
+    normalized = normalized_table(t, args.source)
+    queries = {
+        denormalized: f"SELECT Kunde, COUNT(*) FROM {denormalized} GROUP BY Kunde",
+        normalized: f"SELECT k.Name, COUNT(*) FROM {normalized} f JOIN {TABLES['Kunde']} k ON k.ID = f.Kunde_ID GROUP BY k.Name",
+    }
+    # The normalized layout needs its dimension tables as well
+    storage = {
+        denormalized: [denormalized],
+        normalized: [normalized, TABLES["Kunde"], TABLES["Titel"]],
+    }
+
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    for table_name, sql in queries.items():
+        size = sum(table_size(cursor, name) for name in storage[table_name])
+        ms = best_time(cursor, sql, args.repeat)
+        print(f"{table_name:<36} size {size:>10} KB  per-customer count {ms:8.1f} ms")
+    cnxn.close()
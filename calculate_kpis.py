@@ -1,13 +1,22 @@
-from typing import List
+from typing import Dict, List
 from datetime import datetime
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 import holidays
 import numpy as np
 import logging
 import json
 
+from database_interactions import get_db, TABLES, correspondence_rollup_tables
+
 
 BZ = json.load(open("config.json", encoding="UTF-8"))["PARAMETER"]["BZ"]
+HOLIDAY_DAYS = json.load(open("config.json", encoding="UTF-8"))["PARAMETER"].get(
+    "HOLIDAY_DAYS", 2.5
+)
+HOURS_PER_DAY = json.load(open("config.json", encoding="UTF-8"))["PARAMETER"].get(
+    "HOURS_PER_DAY", 7.8
+)
 
 
 def round_up(n, decimals=0):
@@ -24,6 +33,24 @@ def round_up(n, decimals=0):
     return np.ceil(n * 10**decimals) / (10**decimals)
 
 
+@lru_cache(maxsize=None)
+def holiday_calendar(year: int) -> tuple:
+    """
+    Returns the German holidays in Hessen for the given and the following year.
+
+    The calendar is built once per year and shared by all callers in the process,
+    e.g. the concurrent team runs of multi_runner.py.
+
+    Args:
+        year (int): The first year of the calendar.
+
+    Returns:
+        tuple: The holidays as "YYYY-MM-DD" strings, suitable for numpy.
+    """
+    de_holidays = holidays.Germany(years=[year, year + 1], prov="HE")
+    return tuple(str(date) for date in de_holidays.keys())
+
+
 def get_workdays(t: datetime, months: List[int]) -> int:
     """
     Calculate the number of working days between the last month and the current month,
@@ -34,11 +61,7 @@ def get_workdays(t: datetime, months: List[int]) -> int:
     """
     current_year = int(t.year)
 
-    # Get German holidays
-    de_holidays = holidays.Germany(years=[current_year, current_year + 1], prov="HE")
-
-    # Convert holidays to a format suitable for numpy
-    np_holidays = [str(date) for date in de_holidays.keys()]
+    np_holidays = list(holiday_calendar(current_year))
 
     # Calculate working days excluding holidays
     working_days = {}
@@ -54,47 +77,97 @@ def get_workdays(t: datetime, months: List[int]) -> int:
     return working_days
 
 
-def personnel_cap(total_minutes: float, t: datetime) -> float:
+def capacity(
+    total_minutes,
+    workdays,
+    holiday_days=HOLIDAY_DAYS,
+    hours_per_day=HOURS_PER_DAY,
+):
+    """
+    Calculates the personnel capacity needed for the given minutes of work.
+
+    All arguments may be numpy arrays, which are broadcast against each other, so whole
+    parameter grids can be evaluated at once.
+
+    Args:
+        total_minutes: The total number of minutes.
+        workdays: The number of working days of the month.
+        holiday_days: The average number of days of leave per person and month.
+        hours_per_day: The working hours per person and day.
+
+    Returns:
+        The personnel capacity, rounded up to 4 decimal places.
+    """
+    minutes_per_person = (
+        (np.asarray(workdays) - holiday_days) * np.asarray(hours_per_day) * 60
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pc = np.where(minutes_per_person > 0, total_minutes / minutes_per_person, 0.0)
+    return round_up(pc, 4)
+
+
+def personnel_cap(
+    total_minutes: float,
+    t: datetime,
+    holiday_days: float = HOLIDAY_DAYS,
+    hours_per_day: float = HOURS_PER_DAY,
+) -> float:
     """
     Calculates the personnel capacity based on the total minutes and the given date.
 
     Args:
         total_minutes (float): The total number of minutes.
         t (datetime): The date for which the personnel capacity is calculated.
+        holiday_days (float): The average number of days of leave per person and month.
+        hours_per_day (float): The working hours per person and day.
 
     Returns:
         float: The calculated personnel capacity.
 
     """
-    workdays = get_workdays(t)
-    holidays = 2.5
-    hours_per_day = 7.8
+    workdays = get_workdays(t, [t.month])[t.month]
     try:
-        pc = total_minutes / ((workdays - holidays) * hours_per_day * 60)
+        pc = float(capacity(total_minutes, workdays, holiday_days, hours_per_day))
     except Exception as e:
         logging.error(f"Error calculating personnel capacity: {e}")
         pc = 0.0
-    pc = round_up(pc, 4)
     return pc
 
 
 def total_minutes_correspondence(
     t: datetime = datetime.now() - relativedelta(months=1),
-) -> int:
+    months: List[int] = None,
+    tables: Dict[str, str] = TABLES,
+    bz: float = BZ,
+) -> Dict[int, float]:
+    """
+    Calculates the total minutes spent on customer correspondence per month.
+
+    The minutes are read from the monthly rollup table with a single query.
+
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        months (List[int], optional): The months to calculate. Defaults to all months up to `t`.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+        bz (float): The processing time per correspondence in minutes.
+
+    Returns:
+        Dict[int, float]: The total minutes per month, 0 for months without data.
+    """
+    if months is None:
+        months = list(range(1, t.month + 1))
+    tm_correspondence = {month: 0 for month in months}
+
     cnxn = get_db()
     try:
         cursor = cnxn.cursor()
-        table_name = TABLES["Kunden Korrespondenz"] + t.strftime("_%Y")
-
-        # Format t into a string that SQL Server can understand
-        t_str = t.strftime("%d.%m.%Y")
-        cursor.execute(
-            f"SELECT Anzahl FROM {table_name} WHERE MONTH(Zeitstempel) = MONTH('{t_str}')"
-        )
-        tm_correspondence = cursor.fetchone()[0] * BZ
+        _, monthly_table = correspondence_rollup_tables(t, tables)
+        cursor.execute(f"SELECT Monat, Anzahl FROM {monthly_table}")
+        for month, count in cursor.fetchall():
+            if month in tm_correspondence:
+                tm_correspondence[month] = count * bz
     except Exception as e:
         logging.error(f"Error retrieving total minutes for correspondence: {e}")
-        tm_correspondence = 0
 
     cnxn.close()
     return tm_correspondence
@@ -1,44 +1,86 @@
 from datetime import datetime
 import logging
 import json
-from typing import List
+import threading
+from typing import Dict, List, Tuple
 
 import pyodbc
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
 
 TABLES = json.load(open("config.json", encoding="UTF-8"))["TABLE_NAMES"]
+COMMIT_MARKER = json.load(open("config.json", encoding="UTF-8"))["COMMIT_MARKER"]
+NORMALIZED = json.load(open("config.json", encoding="UTF-8"))["PARAMETER"].get(
+    "NORMALIZED", False
+)
 
+# Surrogate keys of the dimension tables by table name and name, shared by all runs
+# of the process. Keys never change once assigned, so the cache is never invalidated.
+_dimension_keys: Dict[str, Dict[str, int]] = {}
+_dimension_lock = threading.Lock()
+# Names looked up per query, well below the 2100 parameters allowed by SQL Server
+DIMENSION_BATCH = 1000
 
-def get_db() -> pyodbc.Connection:
-    """
-    Retrieves a connection to the database.
 
-    Returns:
-        pyodbc.Connection: The database connection object.
+def _connection_string(config: dict = None) -> str:
+    """
+    Builds the ODBC connection string from a configuration, by default config.json.
     """
-    server = json.load(open("config.json", encoding="UTF-8"))["SERVER"]
-    database = json.load(open("config.json", encoding="UTF-8"))["DATABASE"]
-    username = json.load(open("config.json", encoding="UTF-8"))["AUTHENTICATION"][
-        "USERNAME"
-    ]
-    password = json.load(open("config.json", encoding="UTF-8"))["AUTHENTICATION"][
-        "PASSWORD"
-    ]
-    cnxn = pyodbc.connect(
+    if config is None:
+        config = json.load(open("config.json", encoding="UTF-8"))
+    return (
         "DRIVER={ODBC Driver 17 for SQL Server};SERVER="
-        + server
+        + config["SERVER"]
         + ";DATABASE="
-        + database
+        + config["DATABASE"]
         + ";UID="
-        + username
+        + config["AUTHENTICATION"]["USERNAME"]
         + ";PWD="
-        + password,
-        timeout=60,
+        + config["AUTHENTICATION"]["PASSWORD"]
     )
+
+
+# ODBC connection pooling is process wide, so every caller of get_db - including
+# concurrent team runs in multi_runner.py - reuses the same pooled connections.
+pyodbc.pooling = True
+CONNECTION_STRING = _connection_string()
+
+
+def get_db() -> pyodbc.Connection:
+    """
+    Retrieves a connection to the database.
+
+    Returns:
+        pyodbc.Connection: The database connection object.
+    """
+    cnxn = pyodbc.connect(CONNECTION_STRING, timeout=60)
     return cnxn
 
 
+def check_connection_config(config: dict) -> None:
+    """
+    Checks that a configuration uses the database of this process.
+
+    All connections are opened with the connection string of config.json, so a team
+    configured for another server, database or user would silently be written into
+    the default database. Such configurations are rejected.
+
+    Args:
+        config (dict): The configuration of the run.
+
+    Returns:
+        None
+    """
+    if _connection_string(config) != CONNECTION_STRING:
+        logging.error(
+            f"Configuration uses database {config['DATABASE']} on {config['SERVER']}, "
+            "but this process only connects to the database of config.json"
+        )
+        exit(1)
+
+
 def check_database_connection() -> None:
     """
     Checks the availability of the database connection.
@@ -57,23 +99,76 @@ def check_database_connection() -> None:
         exit(1)
 
 
-def create_correspondence(t: datetime) -> None:
+def _rows(df: pd.DataFrame, columns: List[str]) -> List[tuple]:
+    """
+    Converts the given columns of a DataFrame into plain Python rows for `executemany`.
+
+    Arrow-backed frames are handed over to Arrow without copying and converted column-wise,
+    all other frames are converted through object rows.
+
+    Args:
+        df (pd.DataFrame): The DataFrame holding the data.
+        columns (List[str]): The columns to insert, in the order of the INSERT statement.
+
+    Returns:
+        List[tuple]: One tuple per row.
+    """
+    if all(getattr(df[c].dtype, "storage", None) == "pyarrow" for c in columns):
+        table = pa.Table.from_pandas(df[columns], preserve_index=False)
+        return list(zip(*(table.column(c).to_pylist() for c in columns)))
+    return list(df[columns].astype(object).itertuples(index=False, name=None))
+
+
+def _bulk_insert(cursor: pyodbc.Cursor, sql: str, rows: List[tuple]) -> None:
+    """
+    Inserts all rows with a single parameter array instead of one round trip per row.
+    """
+    if not rows:
+        return
+    cursor.fast_executemany = True
+    cursor.executemany(sql, rows)
+
+
+def correspondence_rollup_tables(t: datetime, tables: Dict[str, str] = TABLES) -> tuple:
+    """
+    Returns the names of the daily and monthly rollup tables of the customer correspondence.
+
+    Args:
+        t (datetime): The timestamp used to generate the table names.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        tuple: The daily and the monthly table name.
+    """
+    table_name = tables["Kunden Korrespondenz"] + t.strftime("_%Y")
+    return table_name + "_Tag", table_name + "_Monat"
+
+
+def create_correspondence(t: datetime, tables: Dict[str, str] = TABLES) -> None:
     """
     Creates a new table in the database for storing customer correspondence.
 
     Args:
         t (datetime): The timestamp used to generate the table name.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
 
     Returns:
         None
     """
     cnxn = get_db()
     cursor = cnxn.cursor()
-    table_name = TABLES["Kunden Korrespondenz"] + t.strftime("_%Y")
+    table_name = tables["Kunden Korrespondenz"] + t.strftime("_%Y")
+    daily_table, monthly_table = correspondence_rollup_tables(t, tables)
     try:
         cursor.execute(
             f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{table_name}') CREATE TABLE {table_name} (Zeitstempel date, Anzahl int)"
         )
+        cursor.execute(
+            f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{daily_table}') CREATE TABLE {daily_table} (Tag date PRIMARY KEY, Anzahl int)"
+        )
+        cursor.execute(
+            f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{monthly_table}') CREATE TABLE {monthly_table} (Monat int PRIMARY KEY, Anzahl int)"
+        )
         cnxn.commit()
         cnxn.close()
         logging.info(f"Created table {table_name}")
@@ -82,19 +177,20 @@ def create_correspondence(t: datetime) -> None:
         logging.error(f"Could not create table {table_name}: {e}")
 
 
-def create_mail_order(t: datetime) -> None:
+def create_mail_order(t: datetime, tables: Dict[str, str] = TABLES) -> None:
     """
     Creates a table in the database for storing mail orders, if it does not already exist. The table name is generated based on the provided timestamp.
 
     Args:
         t (datetime): The timestamp used to generate the table name.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
 
     Returns:
         None
     """
     cnxn = get_db()
     cursor = cnxn.cursor()
-    table_name = TABLES["Mail Order"] + t.strftime("_%Y")
+    table_name = tables["Mail Order"] + t.strftime("_%Y")
     try:
         cursor.execute(
             f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{table_name}') CREATE TABLE {table_name} (Zeitstempel datetime, Kunde nvarchar(255), Titel nvarchar(255))"
@@ -107,12 +203,13 @@ def create_mail_order(t: datetime) -> None:
         logging.error(f"Could not create table {table_name}: {e}")
 
 
-def create_mail_service(t: datetime) -> None:
+def create_mail_service(t: datetime, tables: Dict[str, str] = TABLES) -> None:
     """
     Creates a table in the database for the mail service, if it does not already exist. The table name is generated based on the provided timestamp.
 
     Args:
         t (datetime): The timestamp used to create the table name.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
 
     Returns:
         None
@@ -120,7 +217,7 @@ def create_mail_service(t: datetime) -> None:
     cnxn = get_db()
     cursor = cnxn.cursor()
 
-    table_name = TABLES["Mail Service"] + t.strftime("_%Y")
+    table_name = tables["Mail Service"] + t.strftime("_%Y")
 
     try:
         cursor.execute(
@@ -134,23 +231,76 @@ def create_mail_service(t: datetime) -> None:
         cnxn.close()
 
 
-def create_vak(t: datetime) -> None:
+def vak_rollup_tables(t: datetime, tables: Dict[str, str] = TABLES) -> Dict[str, str]:
+    """
+    Returns the names of the VAK rollup tables.
+
+    All rollups store the sum of Anzahl, the sum of Anzahl * Durchschnitt in seconds,
+    the sum of Anzahl of the intervals with a known Durchschnitt as Gewicht and the
+    volume-weighted mean of Durchschnitt in seconds as computed column:
+
+    - "Stunde": one row per hour
+    - "Tag": one row per day
+    - "Profil": one row per month, weekday (1 = Monday) and hour of day; summing a
+      range of months gives the weekday-by-hour profile of that range
+
+    Args:
+        t (datetime): The timestamp used to generate the table names.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        Dict[str, str]: The table name per rollup.
+    """
+    table_name = tables["VAK"] + t.strftime("_%Y")
+    return {
+        "Stunde": table_name + "_Stunde",
+        "Tag": table_name + "_Tag",
+        "Profil": table_name + "_Profil",
+    }
+
+
+def create_vak(t: datetime, tables: Dict[str, str] = TABLES) -> None:
     """
     Creates a table in the database for storing VAK data, if it does not already exist. The table name is generated based on the provided timestamp.
 
     Args:
         t (datetime): The datetime for which the table should be created.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
 
     Returns:
         None
     """
     cnxn = get_db()
     cursor = cnxn.cursor()
-    table_name = TABLES["VAK"] + t.strftime("_%Y")
+    table_name = tables["VAK"] + t.strftime("_%Y")
+    rollups = vak_rollup_tables(t, tables)
+    measures = "Anzahl int, Sekunden bigint, Gewicht int, Durchschnitt AS CAST(Sekunden AS float) / NULLIF(Gewicht, 0)"
     try:
         cursor.execute(
             f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{table_name}') CREATE TABLE {table_name}(Zeitstempel datetime, Anzahl int, Durchschnitt time(0))"
         )
+        # Rollups created without Gewicht are rebuilt from the 15-minute intervals
+        cursor.execute(
+            "SELECT COUNT(*) FROM sys.tables WHERE name IN (?, ?, ?) AND COL_LENGTH(name, 'Gewicht') IS NULL",
+            *rollups.values(),
+        )
+        outdated = cursor.fetchone()[0] > 0
+        if outdated:
+            for rollup_table in rollups.values():
+                cursor.execute(
+                    f"IF OBJECT_ID('{rollup_table}') IS NOT NULL DROP TABLE {rollup_table}"
+                )
+        cursor.execute(
+            f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{rollups['Stunde']}') CREATE TABLE {rollups['Stunde']} (Stunde datetime PRIMARY KEY, {measures})"
+        )
+        cursor.execute(
+            f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{rollups['Tag']}') CREATE TABLE {rollups['Tag']} (Tag date PRIMARY KEY, {measures})"
+        )
+        cursor.execute(
+            f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{rollups['Profil']}') CREATE TABLE {rollups['Profil']} (Monat int, Wochentag int, Stunde int, {measures}, PRIMARY KEY (Monat, Wochentag, Stunde))"
+        )
+        if outdated:
+            _refresh_vak_rollups(cursor, t, list(range(1, 13)), tables)
         cnxn.commit()
         cnxn.close()
         logging.info(f"Created table {table_name}")
@@ -159,19 +309,20 @@ def create_vak(t: datetime) -> None:
         cnxn.close()
 
 
-def create_kpis(t: datetime) -> None:
+def create_kpis(t: datetime, tables: Dict[str, str] = TABLES) -> None:
     """
     Create a table in the database for storing KPIs, if it does not already exist. The table name is generated based on the provided timestamp.
 
     Args:
         t (datetime): The timestamp used to generate the table name.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
 
     Returns:
         None
     """
     cnxn = get_db()
     cursor = cnxn.cursor()
-    table_name = TABLES["KPIS"] + t.strftime("_%Y")
+    table_name = tables["KPIS"] + t.strftime("_%Y")
 
     try:
         cursor.execute(
@@ -189,19 +340,164 @@ from typing import List
 from datetime import datetime
 
 
-def determine_missing_kpis(t: datetime) -> List[int]:
+def normalized_table(t: datetime, source: str, tables: Dict[str, str] = TABLES) -> str:
+    """
+    Returns the name of the fact table of Mail Order or Mail Service in normalized load mode.
+
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        source (str): "Mail Order" or "Mail Service".
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        str: The table name.
+    """
+    return tables[source] + t.strftime("_%Y") + "_Norm"
+
+
+def create_dimensions(tables: Dict[str, str] = TABLES) -> None:
+    """
+    Creates the dimension tables for Kunde and Titel, if they do not already exist.
+
+    The names use a binary collation, so names differing only in case get their own key.
+
+    Args:
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        None
+    """
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    try:
+        for dimension in ("Kunde", "Titel"):
+            table_name = tables[dimension]
+            cursor.execute(
+                f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{table_name}') CREATE TABLE {table_name} (ID int IDENTITY(1,1) PRIMARY KEY, Name nvarchar(255) COLLATE Latin1_General_BIN2 NOT NULL UNIQUE)"
+            )
+            logging.info(f"Created table {table_name}")
+        cnxn.commit()
+        cnxn.close()
+    except Exception as e:
+        logging.error(f"Could not create dimension tables: {e}")
+        cnxn.close()
+
+
+def create_mail_normalized(
+    t: datetime, source: str, tables: Dict[str, str] = TABLES
+) -> None:
+    """
+    Creates the fact table of Mail Order or Mail Service for the normalized load mode,
+    which stores the keys of the dimension tables instead of the names.
+
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        source (str): "Mail Order" or "Mail Service".
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        None
+    """
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    table_name = normalized_table(t, source, tables)
+    try:
+        cursor.execute(
+            f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{table_name}') CREATE TABLE {table_name} (Zeitstempel datetime, Kunde_ID int, Titel_ID int)"
+        )
+        cnxn.commit()
+        cnxn.close()
+        logging.info(f"Created table {table_name}")
+    except Exception as e:
+        logging.error(f"Could not create table {table_name}: {e}")
+        cnxn.close()
+
+
+def dimension_keys(
+    cursor: pyodbc.Cursor, table_name: str, names: np.ndarray
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Returns the surrogate keys of the given names and inserts names that are not yet
+    in the dimension table.
+
+    The keys are served from an in-memory cache, which is filled from the dimension
+    table on first use. Names missing from the cache are inserted unless another run
+    has added them in the meantime, and only their keys are read back. The new keys
+    are not cached here, as the transaction may still fail; pass them on to
+    `remember_dimension_keys` once it is committed.
+
+    Args:
+        cursor (pyodbc.Cursor): The cursor of the open transaction.
+        table_name (str): The name of the dimension table.
+        names (np.ndarray): The distinct names.
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, int]]: The key of every name, in the order of
+        `names`, and the keys of the names that were missing from the cache.
+    """
+    # The lock only guards the cache. It is never held during SQL statements, as these
+    # may wait for the transaction of another run, which in turn may need the lock.
+    with _dimension_lock:
+        keys = _dimension_keys.get(table_name)
+    if keys is None:
+        cursor.execute(f"SELECT ID, Name FROM {table_name}")
+        loaded = {name: key for key, name in cursor.fetchall()}
+        with _dimension_lock:
+            keys = _dimension_keys.setdefault(table_name, loaded)
+
+    with _dimension_lock:
+        missing = [name for name in names if name not in keys]
+    new_keys = {}
+    if missing:
+        _bulk_insert(
+            cursor,
+            f"INSERT INTO {table_name} (Name) SELECT ? WHERE NOT EXISTS (SELECT 1 FROM {table_name} WITH (UPDLOCK, HOLDLOCK) WHERE Name = ?)",
+            [(name, name) for name in missing],
+        )
+        for start in range(0, len(missing), DIMENSION_BATCH):
+            batch = missing[start : start + DIMENSION_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            cursor.execute(
+                f"SELECT ID, Name FROM {table_name} WHERE Name IN ({placeholders})",
+                *batch,
+            )
+            new_keys.update({name: key for key, name in cursor.fetchall()})
+
+    with _dimension_lock:
+        return (
+            np.fromiter(
+                (new_keys.get(name) or keys[name] for name in names),
+                dtype=np.int64,
+                count=len(names),
+            ),
+            new_keys,
+        )
+
+
+def remember_dimension_keys(table_name: str, new_keys: Dict[str, int]) -> None:
+    """
+    Adds the keys of committed dimension rows to the in-memory cache, see `dimension_keys`.
+    """
+    with _dimension_lock:
+        keys = _dimension_keys.get(table_name)
+        if keys is not None:
+            keys.update(new_keys)
+
+
+def determine_missing_kpis(t: datetime, tables: Dict[str, str] = TABLES) -> List[int]:
     """
     Determines the missing months for a given datetime.
 
     Args:
         t (datetime): The datetime for which missing months need to be determined.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
 
     Returns:
         List[int]: A list of missing months (as integers) for the given datetime.
     """
     cnxn = get_db()
     cursor = cnxn.cursor()
-    table_name = TABLES["KPIS"] + t.strftime("_%Y")
+    table_name = tables["KPIS"] + t.strftime("_%Y")
     current_month = t.month
 
     # get KPI rows check which month is not in the table
@@ -213,9 +509,39 @@ def determine_missing_kpis(t: datetime) -> List[int]:
     return missing_months
 
 
-def upsert_mail_order(t: datetime, df: pd.DataFrame, months: List[int]):
+def committed_months(t: datetime, tables: Dict[str, str] = TABLES) -> List[int]:
+    """
+    Determines the months of a year that have been loaded into the database.
+
+    All sources of a month are loaded together, so the monthly rollup of the customer
+    correspondence tells which months are in the database.
+
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        List[int]: The loaded months in ascending order.
+    """
+    _, monthly_table = correspondence_rollup_tables(t, tables)
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    try:
+        cursor.execute(f"SELECT Monat FROM {monthly_table} ORDER BY Monat")
+        rows = cursor.fetchall()
+    finally:
+        cnxn.close()
+    return [int(row[0]) for row in rows]
+
+
+def upsert_mail_order(
+    t: datetime,
+    df: pd.DataFrame,
+    months: List[int],
+    tables: Dict[str, str] = TABLES,
+):
 
-    table_name = TABLES["Mail Order"] + t.strftime("_%Y")
+    table_name = tables["Mail Order"] + t.strftime("_%Y")
 
     df = df[df["Zeitstempel"].dt.month.isin(months)]
 
@@ -223,13 +549,11 @@ def upsert_mail_order(t: datetime, df: pd.DataFrame, months: List[int]):
     cursor = cnxn.cursor()
 
     try:
-        for _, row in df.iterrows():
-            cursor.execute(
-                f"INSERT INTO {table_name} (Zeitstempel, Kunde, Titel) VALUES (?, ?, ?)",
-                row["Zeitstempel"],
-                row["Kunde"],
-                row["Titel"],
-            )
+        _bulk_insert(
+            cursor,
+            f"INSERT INTO {table_name} (Zeitstempel, Kunde, Titel) VALUES (?, ?, ?)",
+            _rows(df, ["Zeitstempel", "Kunde", "Titel"]),
+        )
         cnxn.commit()
         cnxn.close()
         logging.info(f"Sucessfully upsert data into{table_name} for months {months}")
@@ -239,9 +563,14 @@ def upsert_mail_order(t: datetime, df: pd.DataFrame, months: List[int]):
         exit(1)
 
 
-def upsert_mail_service(t: datetime, df: pd.DataFrame, months: List[int]):
+def upsert_mail_service(
+    t: datetime,
+    df: pd.DataFrame,
+    months: List[int],
+    tables: Dict[str, str] = TABLES,
+):
 
-    table_name = TABLES["Mail Service"] + t.strftime("_%Y")
+    table_name = tables["Mail Service"] + t.strftime("_%Y")
 
     df = df[df["Zeitstempel"].dt.month.isin(months)]
 
@@ -249,15 +578,13 @@ def upsert_mail_service(t: datetime, df: pd.DataFrame, months: List[int]):
     cursor = cnxn.cursor()
 
     try:
-        for _, row in df.iterrows():
-            cursor.execute(
-                f"INSERT INTO {table_name} (Zeitstempel, Kunde, Titel) VALUES (?, ?, ?)",
-                row["Zeitstempel"],
-                row["Kunde"],
-                row["Titel"],
-            )
-            cnxn.commit()
-            cnxn.close()
+        _bulk_insert(
+            cursor,
+            f"INSERT INTO {table_name} (Zeitstempel, Kunde, Titel) VALUES (?, ?, ?)",
+            _rows(df, ["Zeitstempel", "Kunde", "Titel"]),
+        )
+        cnxn.commit()
+        cnxn.close()
         logging.info(f"Sucessfully upsert data into {table_name} for months {months}")
 
     except Exception as e:
@@ -266,32 +593,138 @@ def upsert_mail_service(t: datetime, df: pd.DataFrame, months: List[int]):
         exit(1)
 
 
-def upsert_correspondence(t: datetime, df: pd.DataFrame, months: List[int]):
+def upsert_mail_normalized(
+    t: datetime,
+    source: str,
+    df: pd.DataFrame,
+    uniques: Dict[str, np.ndarray],
+    months: List[int],
+    tables: Dict[str, str] = TABLES,
+):
+    """
+    Inserts Mail Order or Mail Service rows in normalized load mode: the names are
+    upserted into the dimension tables and the fact table stores only their keys.
 
-    table_name = TABLES["Kunden Korrespondenz"] + t.strftime("_%Y")
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        source (str): "Mail Order" or "Mail Service".
+        df (pd.DataFrame): The data with the columns Zeitstempel, Kunde_Code and Titel_Code,
+            see `factorize_dimensions`.
+        uniques (Dict[str, np.ndarray]): The names per dimension the codes refer to.
+        months (List[int]): The months to insert.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        None
+    """
+
+    table_name = normalized_table(t, source, tables)
 
     df = df[df["Zeitstempel"].dt.month.isin(months)]
 
     cnxn = get_db()
     cursor = cnxn.cursor()
+
     try:
-        cursor.execute(
+        kunde_keys, new_kunden = dimension_keys(
+            cursor, tables["Kunde"], uniques["Kunde"]
+        )
+        titel_keys, new_titel = dimension_keys(
+            cursor, tables["Titel"], uniques["Titel"]
+        )
+        cnxn.commit()
+        remember_dimension_keys(tables["Kunde"], new_kunden)
+        remember_dimension_keys(tables["Titel"], new_titel)
+
+        timestamps = _rows(df, ["Zeitstempel"])
+        rows = zip(
+            (row[0] for row in timestamps),
+            kunde_keys[df["Kunde_Code"].to_numpy()].tolist(),
+            titel_keys[df["Titel_Code"].to_numpy()].tolist(),
+        )
+        _bulk_insert(
+            cursor,
+            f"INSERT INTO {table_name} (Zeitstempel, Kunde_ID, Titel_ID) VALUES (?, ?, ?)",
+            list(rows),
+        )
+        cnxn.commit()
+        cnxn.close()
+        logging.info(f"Sucessfully upsert data into {table_name} for months {months}")
+    except Exception as e:
+        logging.error(f"Could not upsert data into {table_name}: {e}")
+        cnxn.close()
+        exit(1)
+
+
+def upsert_correspondence(
+    t: datetime,
+    df: pd.DataFrame,
+    months: List[int],
+    tables: Dict[str, str] = TABLES,
+):
+    """
+    Inserts all correspondence rows of the given months and recomputes the daily and
+    monthly rollups of these months in the same transaction.
+
+    Args:
+        t (datetime): The timestamp used to generate the table names.
+        df (pd.DataFrame): The correspondence data with the columns Zeitstempel and Anzahl.
+        months (List[int]): The months to insert.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        None
+    """
+
+    table_name = tables["Kunden Korrespondenz"] + t.strftime("_%Y")
+    daily_table, monthly_table = correspondence_rollup_tables(t, tables)
+
+    df = df[df["Zeitstempel"].dt.month.isin(months)]
+    months = [int(m) for m in months]
+    placeholders = ", ".join("?" for _ in months)
+
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    try:
+        _bulk_insert(
+            cursor,
             f"INSERT INTO {table_name} (Zeitstempel, Anzahl) VALUES (?, ?)",
-            df["Zeitstempel"][0],
-            int(df["Anzahl"][0]),
+            _rows(df, ["Zeitstempel", "Anzahl"]),
+        )
+        cursor.execute(
+            f"DELETE FROM {daily_table} WHERE MONTH(Tag) IN ({placeholders})",
+            *months,
+        )
+        cursor.execute(
+            f"INSERT INTO {daily_table} (Tag, Anzahl) SELECT Zeitstempel, SUM(Anzahl) FROM {table_name} WHERE MONTH(Zeitstempel) IN ({placeholders}) GROUP BY Zeitstempel",
+            *months,
+        )
+        cursor.execute(
+            f"DELETE FROM {monthly_table} WHERE Monat IN ({placeholders})",
+            *months,
+        )
+        cursor.execute(
+            f"INSERT INTO {monthly_table} (Monat, Anzahl) SELECT MONTH(Tag), SUM(Anzahl) FROM {daily_table} WHERE MONTH(Tag) IN ({placeholders}) GROUP BY MONTH(Tag)",
+            *months,
         )
         cnxn.commit()
         cnxn.close()
-        logging.info(f"Upsert data into {table_name}")
+        logging.info(f"Upsert data into {table_name} for months {months}")
     except Exception as e:
         logging.error(f"Could not upsert data into {table_name}: {e}")
+        cnxn.rollback()
         cnxn.close()
         exit(1)
 
 
-def upsert_vak(t: datetime, df: pd.DataFrame, months: List[int]):
+def upsert_vak(
+    t: datetime,
+    df: pd.DataFrame,
+    months: List[int],
+    tables: Dict[str, str] = TABLES,
+):
 
-    table_name = TABLES["VAK"] + t.strftime("_%Y")
+    table_name = tables["VAK"] + t.strftime("_%Y")
 
     df = df[df["Zeitstempel"].dt.month.isin(months)]
 
@@ -299,15 +732,203 @@ def upsert_vak(t: datetime, df: pd.DataFrame, months: List[int]):
     cursor = cnxn.cursor()
 
     try:
-        cursor = cnxn.cursor()
-        for _, row in df.iterrows():
-            cursor.execute(
-                f"INSERT INTO {table_name} (Zeitstempel, Anzahl, Durchschnitt) VALUES (?,?,?)",
-                (row["Zeitstempel"], row["Anzahl"], row["Durchschnitt"]),
-            )
+        _bulk_insert(
+            cursor,
+            f"INSERT INTO {table_name} (Zeitstempel, Anzahl, Durchschnitt) VALUES (?,?,?)",
+            _rows(df, ["Zeitstempel", "Anzahl", "Durchschnitt"]),
+        )
+        _refresh_vak_rollups(cursor, t, [int(m) for m in months], tables)
         cnxn.commit()
+        cnxn.close()
         logging.info(f"Upsert data into {table_name}")
     except Exception as e:
         logging.error(f"Could not upsert data into {table_name}: {e}")
+        cnxn.rollback()
         cnxn.close()
         exit(1)
+
+
+def _refresh_vak_rollups(
+    cursor: pyodbc.Cursor, t: datetime, months: List[int], tables: Dict[str, str]
+) -> None:
+    """
+    Recomputes the VAK rollups of the given months from the 15-minute intervals.
+    Rows of other months are left untouched.
+    """
+    table_name = tables["VAK"] + t.strftime("_%Y")
+    rollups = vak_rollup_tables(t, tables)
+    placeholders = ", ".join("?" for _ in months)
+    seconds = "SUM(CAST(Anzahl AS bigint) * DATEDIFF(second, CAST('00:00:00' AS time), Durchschnitt))"
+    # Intervals without Durchschnitt add nothing to Sekunden, so neither to the weight
+    weight = "SUM(CASE WHEN Durchschnitt IS NOT NULL THEN Anzahl END)"
+    where = f"WHERE MONTH(Zeitstempel) IN ({placeholders})"
+    hour = "DATEADD(hour, DATEDIFF(hour, 0, Zeitstempel), 0)"
+
+    cursor.execute(
+        f"DELETE FROM {rollups['Stunde']} WHERE MONTH(Stunde) IN ({placeholders})",
+        *months,
+    )
+    cursor.execute(
+        f"INSERT INTO {rollups['Stunde']} (Stunde, Anzahl, Sekunden, Gewicht) SELECT {hour}, SUM(Anzahl), {seconds}, {weight} FROM {table_name} {where} GROUP BY {hour}",
+        *months,
+    )
+    cursor.execute(
+        f"DELETE FROM {rollups['Tag']} WHERE MONTH(Tag) IN ({placeholders})",
+        *months,
+    )
+    cursor.execute(
+        f"INSERT INTO {rollups['Tag']} (Tag, Anzahl, Sekunden, Gewicht) SELECT CAST(Stunde AS date), SUM(Anzahl), SUM(Sekunden), SUM(Gewicht) FROM {rollups['Stunde']} WHERE MONTH(Stunde) IN ({placeholders}) GROUP BY CAST(Stunde AS date)",
+        *months,
+    )
+    cursor.execute(
+        f"DELETE FROM {rollups['Profil']} WHERE Monat IN ({placeholders})",
+        *months,
+    )
+    cursor.execute(
+        f"INSERT INTO {rollups['Profil']} (Monat, Wochentag, Stunde, Anzahl, Sekunden, Gewicht) SELECT MONTH(Stunde), DATEDIFF(day, 0, Stunde) % 7 + 1, DATEPART(hour, Stunde), SUM(Anzahl), SUM(Sekunden), SUM(Gewicht) FROM {rollups['Stunde']} WHERE MONTH(Stunde) IN ({placeholders}) GROUP BY MONTH(Stunde), DATEDIFF(day, 0, Stunde) % 7 + 1, DATEPART(hour, Stunde)",
+        *months,
+    )
+
+
+def write_commit_marker(
+    t: datetime, months: List[int], marker_path: str = COMMIT_MARKER
+) -> None:
+    """
+    Records that new months have been committed to the database.
+
+    Readers holding cached query results compare the modification time of the marker
+    file to decide whether their cache is still valid.
+
+    Args:
+        t (datetime): The timestamp of the run.
+        months (List[int]): The months that have been committed.
+        marker_path (str): The path of the marker file, defaults to config.json.
+
+    Returns:
+        None
+    """
+    with open(marker_path, "w", encoding="UTF-8") as f:
+        json.dump(
+            {
+                "year": t.year,
+                "months": sorted(int(m) for m in months),
+                "committed": datetime.now().isoformat(timespec="seconds"),
+            },
+            f,
+        )
+    logging.info(f"Wrote commit marker for months {months}")
+
+
+def select_kpis(
+    t: datetime, months: List[int], tables: Dict[str, str] = TABLES
+) -> List[dict]:
+    """
+    Reads the KPI rows of the given months.
+
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        months (List[int]): The months to read.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        List[dict]: One dictionary per month, keyed by column name.
+    """
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    table_name = tables["KPIS"] + t.strftime("_%Y")
+    try:
+        cursor.execute(f"SELECT * FROM {table_name}")
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cnxn.close()
+    rows = [row for row in rows if int(row["Zeitstempel"].split("-")[1]) in months]
+    return sorted(rows, key=lambda row: row["Zeitstempel"])
+
+
+def monthly_aggregates(
+    t: datetime,
+    source: str,
+    months: List[int],
+    tables: Dict[str, str] = TABLES,
+    normalized: bool = NORMALIZED,
+) -> dict:
+    """
+    Aggregates the detail table of a source per month.
+
+    Mail Order and Mail Service rows are counted, for Kunden Korrespondenz and VAK
+    the column Anzahl is summed up. Kunden Korrespondenz is read from its monthly rollup,
+    VAK from its daily rollup.
+
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        source (str): The source, e.g. "Mail Order".
+        months (List[int]): The months to aggregate.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+        normalized (bool): Whether Mail Order and Mail Service are loaded in normalized mode.
+
+    Returns:
+        dict: The aggregated value per month. Months without data are left out.
+    """
+    if not months:
+        return {}
+    table_name = tables[source] + t.strftime("_%Y")
+    if normalized and source in ("Mail Order", "Mail Service"):
+        table_name = normalized_table(t, source, tables)
+    measure = "COUNT(*)" if source in ("Mail Order", "Mail Service") else "SUM(Anzahl)"
+    placeholders = ", ".join("?" for _ in months)
+    sql = f"SELECT MONTH(Zeitstempel), {measure} FROM {table_name} WHERE MONTH(Zeitstempel) IN ({placeholders}) GROUP BY MONTH(Zeitstempel)"
+    if source == "Kunden Korrespondenz":
+        _, monthly_table = correspondence_rollup_tables(t, tables)
+        sql = (
+            f"SELECT Monat, Anzahl FROM {monthly_table} WHERE Monat IN ({placeholders})"
+        )
+    if source == "VAK":
+        daily_table = vak_rollup_tables(t, tables)["Tag"]
+        sql = f"SELECT MONTH(Tag), SUM(Anzahl) FROM {daily_table} WHERE MONTH(Tag) IN ({placeholders}) GROUP BY MONTH(Tag)"
+
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    try:
+        cursor.execute(sql, *[int(m) for m in months])
+        rows = cursor.fetchall()
+    finally:
+        cnxn.close()
+    return {int(month): int(value) for month, value in rows}
+
+
+def select_vak_rollup(
+    t: datetime, rollup: str, months: List[int], tables: Dict[str, str] = TABLES
+) -> List[dict]:
+    """
+    Reads a VAK rollup for the given months, see `vak_rollup_tables`.
+
+    For "Profil" the months are combined into one weekday-by-hour profile.
+
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        rollup (str): "Stunde", "Tag" or "Profil".
+        months (List[int]): The months to read.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        List[dict]: One dictionary per row, keyed by column name.
+    """
+    if not months:
+        return []
+    table_name = vak_rollup_tables(t, tables)[rollup]
+    placeholders = ", ".join("?" for _ in months)
+    if rollup == "Profil":
+        sql = f"SELECT Wochentag, Stunde, SUM(Anzahl) AS Anzahl, SUM(Sekunden) AS Sekunden, CAST(SUM(Sekunden) AS float) / NULLIF(SUM(Gewicht), 0) AS Durchschnitt FROM {table_name} WHERE Monat IN ({placeholders}) GROUP BY Wochentag, Stunde ORDER BY Wochentag, Stunde"
+    else:
+        sql = f"SELECT {rollup}, Anzahl, Sekunden, Durchschnitt FROM {table_name} WHERE MONTH({rollup}) IN ({placeholders}) ORDER BY {rollup}"
+
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    try:
+        cursor.execute(sql, *[int(m) for m in months])
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cnxn.close()
+    return rows
@@ -1,136 +1,260 @@
-from datetime import datetime
-import time
-import os
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import logging
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
 from utils import find_matching_file, remove_timeinterval
 
 
-def check_file_existence(sources, input_dirs, file_names):
+def _read_excel(file_name: str, arrow: bool, **kwargs) -> pd.DataFrame:
     """
-    Check the existence of files based on the specified file patterns.
+    Reads an Excel file, optionally straight into Arrow-backed columns.
 
-    This function iterates through the `sources` list and checks if any files exist
-    based on the file patterns generated from the `input_dirs` and `file_names` dictionaries.
-    If no files are found for a particular source, an error message is logged and the program exits.
+    Args:
+        file_name (str): The path of the Excel file.
+        arrow (bool): Whether the columns should be backed by Apache Arrow.
+        **kwargs: Passed on to `pd.read_excel`.
+
+    Returns:
+        pd.DataFrame: The parsed sheet.
+    """
+    if arrow:
+        kwargs["dtype_backend"] = "pyarrow"
+    return pd.read_excel(file_name, **kwargs)
+
+
+def _read_inputs(
+    input_path: str, file_name: str, files: List[str], arrow: bool, **kwargs
+) -> pd.DataFrame:
+    """
+    Reads all input files of a source into one DataFrame.
+
+    The first index level of the result is the path of the file each row comes from,
+    so the rows of a single file can be selected with `df.xs(path, level=0)`.
 
-    Note: This function assumes that the `sources`, `input_dirs`, and `file_names` variables are defined.
+    Args:
+        input_path (str): The input directory, searched if `files` is None.
+        file_name (str): The file name pattern, used if `files` is None.
+        files (List[str]): The files to read, e.g. from the input manifest.
+        arrow (bool): Whether the columns should be backed by Apache Arrow.
+        **kwargs: Passed on to `pd.read_excel`.
 
     Returns:
-        None
+        pd.DataFrame: The rows of all files, in the order of `files`.
     """
-    for source in sources:
-        file_names = find_matching_file(input_dirs[source], file_names[source])
-        logging.info(f"File found for {source}: {file_names}")
-    logging.info("All files found.")
+    if files is None:
+        files = [find_matching_file(input_path, file_name)]
+    return pd.concat([_read_excel(f, arrow, **kwargs) for f in files], keys=files)
 
 
-def read_mail_order(
-    input_path: str, file_name: str, selected_months: List[int]
+def _truncate(column: pd.Series, arrow: bool) -> pd.Series:
+    """
+    Cuts strings down to the 255 characters allowed by the nvarchar columns.
+    """
+    if arrow:
+        return column.str.slice(0, 255)
+    return column.apply(lambda x: x[:255] if isinstance(x, str) else x)
+
+
+def _fill_na(df: pd.DataFrame, arrow: bool) -> pd.DataFrame:
+    """
+    Replaces missing values with "NA". Arrow-backed frames keep their native
+    nulls outside of string columns, as "NA" cannot be stored in typed Arrow arrays.
+    """
+    if not arrow:
+        return df.fillna("NA")
+    text_columns = [c for c in df.columns if pd.api.types.is_string_dtype(df[c])]
+    return df.assign(**{c: df[c].fillna("NA") for c in text_columns})
+
+
+def _to_datetime(column: pd.Series, arrow: bool) -> pd.Series:
+    """
+    Converts a column to timestamps without leaving the chosen backend.
+    """
+    if arrow:
+        return column.astype(pd.ArrowDtype(pa.timestamp("us")))
+    return pd.to_datetime(column)
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Returns the data of a DataFrame as an Arrow table.
+
+    For frames returned by the `read_*` functions with `arrow=True` the column
+    buffers are shared, so the hand-off to Parquet writers and database loaders
+    does not copy the data.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to convert.
+
+    Returns:
+        pa.Table: The Arrow table.
+    """
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def filter_months(
+    df: pd.DataFrame, selected_months: Optional[List[int]], source: str
 ) -> pd.DataFrame:
+    """
+    Keeps the rows of the selected months and stops if no data is left. Rows without
+    a timestamp are always dropped.
+
+    Args:
+        df (pd.DataFrame): The data as returned by a `read_*` function.
+        selected_months (List[int], optional): The months to keep, None keeps all months.
+        source (str): The name of the source used in the error message.
+
+    Returns:
+        pd.DataFrame: The rows of the selected months.
+    """
+    if selected_months is None:
+        df = df[df["Zeitstempel"].notna()]
+    else:
+        df = df[df["Zeitstempel"].dt.month.isin(selected_months)]
+    if df.empty:
+        logging.error(f"No data available for {source}")
+        exit(1)
+    return df
 
-    file_name = find_matching_file(input_path, file_name)
 
-    df = pd.read_excel(
+def read_mail_order(
+    input_path: str,
+    file_name: str,
+    selected_months: Optional[List[int]],
+    arrow: bool = False,
+    files: List[str] = None,
+) -> pd.DataFrame:
+
+    df = _read_inputs(
+        input_path,
         file_name,
+        files,
+        arrow,
         usecols=[2, 5, 7],
         names=["Kunde", "Titel", "Zeitstempel"],
         na_filter=True,
     )
-    df["Kunde"] = df["Kunde"].apply(lambda x: x[:255] if isinstance(x, str) else x)
-    df["Titel"] = df["Titel"].apply(lambda x: x[:255] if isinstance(x, str) else x)
+    df["Kunde"] = _truncate(df["Kunde"], arrow)
+    df["Titel"] = _truncate(df["Titel"], arrow)
 
     # filter all rows where 'Zeitstempel' is in the same month and as in months
-    df = df[df["Zeitstempel"].dt.month.isin(selected_months)]
+    df = filter_months(df, selected_months, "Mail Order")
 
     # replace all NaN values with "NA"
-    df = df.fillna("NA")
-
-    if df.empty:
-        logging.error("No data available for Mail Order")
-        exit(1)
-    return df
+    return _fill_na(df, arrow)
 
 
 def read_mail_service(
-    input_path: str, file_name: str, selected_months: List[int]
+    input_path: str,
+    file_name: str,
+    selected_months: Optional[List[int]],
+    arrow: bool = False,
+    files: List[str] = None,
 ) -> pd.DataFrame:
 
-    file_name = find_matching_file(input_path, file_name)
-
-    df = pd.read_excel(
+    df = _read_inputs(
+        input_path,
         file_name,
+        files,
+        arrow,
         usecols=[2, 5, 7],
         names=["Kunde", "Titel", "Zeitstempel"],
         na_filter=True,
     )
     df = df.dropna()
-    df["Kunde"] = df["Kunde"].apply(lambda x: x[:255] if isinstance(x, str) else x)
-    df["Titel"] = df["Titel"].apply(lambda x: x[:255] if isinstance(x, str) else x)
-    df = df[df["Zeitstempel"].dt.month.isin(selected_months)]
+    df["Kunde"] = _truncate(df["Kunde"], arrow)
+    df["Titel"] = _truncate(df["Titel"], arrow)
 
-    # replace all NaN values with "NA"
-    df = df.fillna("NA")
+    df = filter_months(df, selected_months, "Mail Service")
 
-    if df.empty:
-        logging.error("No data available for Mail Service")
-        exit(1)
-    return df
+    # replace all NaN values with "NA"
+    return _fill_na(df, arrow)
 
 
 def read_correspondence(
-    input_path: str, file_name: str, selected_months: List[int]
+    input_path: str,
+    file_name: str,
+    selected_months: Optional[List[int]],
+    arrow: bool = False,
+    files: List[str] = None,
 ) -> pd.DataFrame:
-    file_name = find_matching_file(input_path, file_name)
-    df = pd.read_excel(
+    df = _read_inputs(
+        input_path,
         file_name,
+        files,
+        arrow,
         usecols=[0, 1],
         names=["Anzahl", "Zeitstempel"],
         na_filter=True,
     )
     # replace all NaN values with "NA"
-    df = df.fillna("NA")
+    df = _fill_na(df, arrow)
 
     # Convert 'Zeitstempel' to datetime
-    df["Zeitstempel"] = pd.to_datetime(df["Zeitstempel"])
+    df["Zeitstempel"] = _to_datetime(df["Zeitstempel"], arrow)
 
     # filter all rows where 'Zeitstempel' is in the same month and as in months
-    df = df[df["Zeitstempel"].dt.month.isin(selected_months)]
-
-    if df.empty:
-        logging.error("No data available for Correspondence")
-        exit(1)
-
-    return df
+    return filter_months(df, selected_months, "Correspondence")
 
 
 def read_vak(
-    input_path: str, file_name: str, selected_months: List[int]
+    input_path: str,
+    file_name: str,
+    selected_months: Optional[List[int]],
+    arrow: bool = False,
+    files: List[str] = None,
 ) -> pd.DataFrame:
-    file_name = find_matching_file(input_path, file_name)
-    df = pd.read_excel(
+    df = _read_inputs(
+        input_path,
         file_name,
+        files,
+        arrow,
         usecols=[0, 1, 2],
         names=["Zeitstempel", "Anzahl", "Durchschnitt"],
         na_filter=True,
     )
-    df = df.fillna("NA")
+    if arrow:
+        # Blank cells stay null, as "NA" cannot be parsed into timestamps and times
+        df["Zeitstempel"] = df["Zeitstempel"].str.replace(r"-[^-]*$", "", regex=True)
+        df["Durchschnitt"] = df["Durchschnitt"].astype(pd.ArrowDtype(pa.time64("us")))
+    else:
+        df = _fill_na(df, arrow)
+        df["Zeitstempel"] = df["Zeitstempel"].apply(remove_timeinterval)
 
-    df["Zeitstempel"] = df["Zeitstempel"].apply(remove_timeinterval)
-
-    df["Zeitstempel"] = pd.to_datetime(df["Zeitstempel"])
+    df["Zeitstempel"] = _to_datetime(df["Zeitstempel"], arrow)
 
     # filter all rows where 'Zeitstempel' is in the same month and as in months
-    df = df[df["Zeitstempel"].dt.month.isin(selected_months)]
+    return filter_months(df, selected_months, "VAK")
 
-    if df.empty:
-        logging.error("No data available for VAK")
-        exit(1)
 
-    return df
+def factorize_dimensions(
+    df: pd.DataFrame, dimensions: Tuple[str, ...] = ("Kunde", "Titel")
+) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+    """
+    Replaces the text columns of Mail Order / Mail Service data by integer codes.
+
+    Trailing whitespace is removed first, as SQL Server ignores it when comparing the
+    names of the dimension tables.
+
+    Args:
+        df (pd.DataFrame): The data as returned by `read_mail_order` or `read_mail_service`.
+        dimensions (Tuple[str, ...]): The columns to factorize.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, np.ndarray]]: The data with a "<column>_Code" column
+        per dimension instead of the text column, and per dimension the distinct names,
+        where a code is the position in this array.
+    """
+    uniques = {}
+    codes = {}
+    for dimension in dimensions:
+        values = df[dimension].astype(str).str.rstrip()
+        codes[dimension + "_Code"], uniques[dimension] = pd.factorize(values)
+    df_codes = df.drop(columns=list(dimensions)).assign(**codes)
+    return df_codes, {d: np.asarray(u, dtype=object) for d, u in uniques.items()}
 
 
 def available_data(
@@ -167,23 +291,3 @@ def available_data(
 
     logging.info(f"Available months: {available_months}")
     return available_months
-
-
-def move_files(
-    t: datetime, sources: dict, input_dirs: dict, archive_dirs: dict, file_names: dict
-):
-    prefix = "archive_" + t.strftime("%d_%m_%Y") + "_"
-
-    for source in sources:
-        file_name = find_matching_file(input_dirs[source], file_names[source])
-        input_file = os.path.join(input_dirs[source], file_name)
-        archive_file = os.path.join(archive_dirs[source], prefix + file_name)
-        try:
-            if os.path.exists(archive_file):
-                base, extension = os.path.splitext(archive_file)
-                archive_file = f"{base}_{int(time.time())}{extension}"
-            os.rename(input_file, archive_file)
-        except Exception as e:
-            logging.error(f"Could not move file {input_file} to {archive_file}: {e}")
-            exit(1)
-    logging.info(f"Moved file {input_file} to {archive_file}")
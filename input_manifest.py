@@ -0,0 +1,136 @@
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from archive_store import file_hash
+
+PERIOD_PATTERN = re.compile(r"_(\d{2})_(\d{4})(?=\D*$)")
+
+
+def infer_period(file_name: str) -> Optional[str]:
+    """
+    Infers the month of a file from names like "..._02_2024.xlsx".
+
+    Args:
+        file_name (str): The name of the file.
+
+    Returns:
+        Optional[str]: The month as "YYYY-MM", or None if the name has no period.
+    """
+    match = PERIOD_PATTERN.search(os.path.basename(file_name))
+    if match is None or not 1 <= int(match.group(1)) <= 12:
+        return None
+    return f"{match.group(2)}-{match.group(1)}"
+
+
+def is_settled(
+    path: str, mtime: float, settle_seconds: float, now: Optional[float] = None
+) -> bool:
+    """
+    Checks whether a file is complete, i.e. not being written or open in Excel.
+
+    A file counts as still being written if Excel holds a "~$" lock file for it or
+    if it has been modified within the last `settle_seconds`.
+
+    Args:
+        path (str): The path of the file.
+        mtime (float): The modification time of the file.
+        settle_seconds (float): The minimum age of a complete file in seconds.
+        now (float, optional): The current time. Defaults to `time.time()`.
+
+    Returns:
+        bool: True if the file can be read.
+    """
+    now = time.time() if now is None else now
+    directory, name = os.path.split(path)
+    if os.path.exists(os.path.join(directory, "~$" + name)):
+        return False
+    return now - mtime >= settle_seconds
+
+
+def scan_inputs(
+    sources: List[str],
+    input_dirs: Dict[str, str],
+    file_names: Dict[str, str],
+    settle_seconds: float = 60,
+) -> Dict[str, List[dict]]:
+    """
+    Scans every input directory once and builds the manifest of the run.
+
+    Args:
+        sources (List[str]): The sources to scan.
+        input_dirs (Dict[str, str]): The input directory per source.
+        file_names (Dict[str, str]): The file name pattern per source.
+        settle_seconds (float): The minimum age of a complete file in seconds.
+
+    Returns:
+        Dict[str, List[dict]]: Per source the matching files ordered by period, each with
+        path, size, mtime, hash, period and whether the file is settled. Files that are
+        still being written are not hashed.
+    """
+    now = time.time()
+    manifest = {}
+    for source in sources:
+        files = []
+        with os.scandir(input_dirs[source]) as entries:
+            for entry in entries:
+                if (
+                    not entry.is_file()
+                    or entry.name.startswith("~$")
+                    or not entry.name.endswith(".xlsx")
+                    or file_names[source] not in entry.name
+                ):
+                    continue
+                stat = entry.stat()
+                settled = is_settled(entry.path, stat.st_mtime, settle_seconds, now)
+                files.append(
+                    {
+                        "path": entry.path,
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime,
+                        "hash": file_hash(entry.path) if settled else None,
+                        "period": infer_period(entry.name),
+                        "settled": settled,
+                    }
+                )
+        files.sort(key=lambda f: (f["period"] or "", f["mtime"]))
+        manifest[source] = files
+        logging.info(f"Files found for {source}: {[f['path'] for f in files]}")
+    return manifest
+
+
+def check_manifest(manifest: Dict[str, List[dict]]) -> None:
+    """
+    Checks that every source has at least one complete file. Files that are still
+    being written are skipped for this run.
+
+    Args:
+        manifest (Dict[str, List[dict]]): The manifest built by `scan_inputs`.
+
+    Returns:
+        None
+    """
+    for source, files in manifest.items():
+        for f in files:
+            if not f["settled"]:
+                logging.warning(f"File {f['path']} is still being written, skipped")
+        if not settled_files(manifest, source):
+            logging.error(f"No complete file found for {source}.")
+            exit(1)
+    logging.info("All files found.")
+
+
+def settled_files(manifest: Dict[str, List[dict]], source: str) -> List[str]:
+    """
+    Returns the paths of the complete files of a source, ordered by period.
+    """
+    return [f["path"] for f in manifest[source] if f["settled"]]
+
+
+def file_hashes(manifest: Dict[str, List[dict]]) -> Dict[str, str]:
+    """
+    Returns the content hash per file path, so later steps do not read the files again.
+    """
+    return {f["path"]: f["hash"] for files in manifest.values() for f in files}
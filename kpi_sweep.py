@@ -0,0 +1,184 @@
+from datetime import datetime
+from typing import Dict, List
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from calculate_kpis import BZ, HOLIDAY_DAYS, HOURS_PER_DAY, capacity, get_workdays
+from database_interactions import (
+    TABLES,
+    _bulk_insert,
+    get_db,
+    monthly_aggregates,
+    select_vak_rollup,
+)
+from utils import config_logging
+
+# Suffix of the KPI columns per source, as in the KPI table
+KPI_SOURCES = {
+    "Kunden Korrespondenz": "Korrespondenz",
+    "Mail Order": "Order",
+    "Mail Service": "Service",
+    "VAK": "VAK",
+}
+
+
+def load_month_totals(
+    t: datetime, months: List[int], tables: Dict[str, str] = TABLES
+) -> Dict[str, np.ndarray]:
+    """
+    Loads the monthly totals the KPIs are calculated from, once for all scenarios.
+
+    Mail Order, Mail Service and Kunden Korrespondenz yield the number of items per
+    month. VAK yields the handled minutes per month (Anzahl * Durchschnitt), read from
+    the daily VAK rollup.
+
+    Args:
+        t (datetime): The timestamp used to generate the table names.
+        months (List[int]): The months to load.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        Dict[str, np.ndarray]: Per source one value per month, in the order of `months`.
+    """
+    totals = {}
+    for source in ("Kunden Korrespondenz", "Mail Order", "Mail Service"):
+        values = monthly_aggregates(t, source, months, tables)
+        totals[source] = np.array([values.get(m, 0) for m in months], dtype=float)
+
+    vak_seconds = dict.fromkeys(months, 0)
+    for row in select_vak_rollup(t, "Tag", months, tables):
+        vak_seconds[row["Tag"].month] += row["Sekunden"] or 0
+    totals["VAK"] = np.array([vak_seconds[m] / 60 for m in months], dtype=float)
+    return totals
+
+
+def sweep(
+    months: List[int],
+    totals: Dict[str, np.ndarray],
+    workdays: np.ndarray,
+    bz: List[float],
+    holiday_days: List[float],
+    hours_per_day: List[float],
+) -> pd.DataFrame:
+    """
+    Calculates Gesamt_Minuten and Personal_Kapazität for every combination of the
+    parameters and every month in one vectorized pass.
+
+    BZ, the processing time per item in minutes, applies to the item counts of Mail
+    Order, Mail Service and Kunden Korrespondenz; VAK minutes are measured directly.
+
+    Args:
+        months (List[int]): The months of the totals.
+        totals (Dict[str, np.ndarray]): The monthly totals, see `load_month_totals`.
+        workdays (np.ndarray): The working days per month.
+        bz (List[float]): The values of BZ to evaluate.
+        holiday_days (List[float]): The days of leave per person and month to evaluate.
+        hours_per_day (List[float]): The working hours per day to evaluate.
+
+    Returns:
+        pd.DataFrame: One row per scenario and month.
+    """
+    grid_bz, grid_holidays, grid_hours, grid_month = np.meshgrid(
+        np.asarray(bz, dtype=float),
+        np.asarray(holiday_days, dtype=float),
+        np.asarray(hours_per_day, dtype=float),
+        np.arange(len(months)),
+        indexing="ij",
+    )
+    result = {
+        "BZ": grid_bz.ravel(),
+        "Urlaubstage": grid_holidays.ravel(),
+        "Stunden_pro_Tag": grid_hours.ravel(),
+        "Monat": np.asarray(months)[grid_month].ravel(),
+    }
+    month_workdays = np.asarray(workdays, dtype=float)[grid_month]
+    for source, suffix in KPI_SOURCES.items():
+        minutes = totals[source][grid_month]
+        if source != "VAK":
+            minutes = minutes * grid_bz
+        result["Gesamt_Minuten_" + suffix] = np.ceil(minutes).ravel().astype(int)
+        result["Personal_Kapazität_" + suffix] = capacity(
+            minutes, month_workdays, grid_holidays, grid_hours
+        ).ravel()
+    return pd.DataFrame(result)
+
+
+def write_sweep_table(
+    t: datetime, df: pd.DataFrame, tables: Dict[str, str] = TABLES
+) -> None:
+    """
+    Replaces the content of the scenario table KSC_KPIs_<year>_Szenarien with `df`.
+
+    Args:
+        t (datetime): The timestamp used to generate the table name.
+        df (pd.DataFrame): The result of `sweep`.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        None
+    """
+    table_name = tables["KPIS"] + t.strftime("_%Y") + "_Szenarien"
+    columns = ", ".join(
+        f"{c} int" if c == "Monat" or c.startswith("Gesamt_Minuten") else f"{c} float"
+        for c in df.columns
+    )
+    placeholders = ", ".join("?" for _ in df.columns)
+
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    try:
+        cursor.execute(
+            f"IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{table_name}') CREATE TABLE {table_name} ({columns})"
+        )
+        cursor.execute(f"DELETE FROM {table_name}")
+        _bulk_insert(
+            cursor,
+            f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})",
+            list(df.astype(object).itertuples(index=False, name=None)),
+        )
+        cnxn.commit()
+        cnxn.close()
+        logging.info(f"Wrote {len(df)} scenario rows into {table_name}")
+    except Exception as e:
+        logging.error(f"Could not write scenarios into {table_name}: {e}")
+        cnxn.close()
+        exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="What-if sweep over KPI parameters")
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--months", type=int, nargs="+", default=list(range(1, 13)))
+    parser.add_argument("--bz", type=float, nargs="+", default=[BZ])
+    parser.add_argument("--holiday-days", type=float, nargs="+", default=[HOLIDAY_DAYS])
+    parser.add_argument(
+        "--hours-per-day", type=float, nargs="+", default=[HOURS_PER_DAY]
+    )
+    parser.add_argument("--output", help="write the scenarios to this Parquet file")
+    parser.add_argument(
+        "--table", action="store_true", help="write the scenarios to the database"
+    )
+    args = parser.parse_args()
+
+    config_logging()
+    t = datetime(args.year, 1, 1)
+    totals = load_month_totals(t, args.months)
+    workdays = get_workdays(t, args.months)
+    df = sweep(
+        args.months,
+        totals,
+        np.array([workdays[m] for m in args.months]),
+        args.bz,
+        args.holiday_days,
+        args.hours_per_day,
+    )
+
+    if args.output:
+        df.to_parquet(args.output, compression="zstd", index=False)
+    if args.table:
+        write_sweep_table(t, df)
+    if not args.output and not args.table:
+        print(df.to_string(index=False))
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+
+def timed_request(url: str) -> float:
+    """
+    Fetches `url` and returns the latency in milliseconds.
+    """
+    start = time.perf_counter()
+    with urlopen(url) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for query_service.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    paths = [f"/kpis?year={args.year}&from=1&to={m}" for m in range(1, 13)] + [
+        f"/aggregates?source={source}&year={args.year}&from=1&to=12"
+        for source in [
+            "Mail%20Order",
+            "Mail%20Service",
+            "Kunden%20Korrespondenz",
+            "VAK",
+        ]
+    ]
+    urls = [
+        args.url + path
+        for path in itertools.islice(itertools.cycle(paths), args.requests)
+    ]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = np.array(list(pool.map(timed_request, urls)))
+    elapsed = time.perf_counter() - start
+
+    print(f"requests: {len(latencies)}, concurrency: {args.concurrency}")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"p50: {np.percentile(latencies, 50):.2f} ms")
+    print(f"p99: {np.percentile(latencies, 99):.2f} ms")
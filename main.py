@@ -1,54 +1,112 @@
-from typing import Dict
+from typing import Dict, List
 
 import pyodbc
 
 from utils import *
 from database_interactions import *
 from excel_interactions import *
+from archive_store import archive_files, skip_archived
+from input_manifest import check_manifest, file_hashes, scan_inputs, settled_files
 
-file_names: Dict[str, str] = json.load(open("config.json", encoding="UTF-8"))[
-    "FILE_NAMES"
-]
-input_dirs: Dict[str, str] = json.load(open("config.json", encoding="UTF-8"))[
-    "INPUT_DIRS"
-]
+sources = ["Mail Order", "Mail Service", "Kunden Korrespondenz", "VAK"]
 
-archive_dirs: Dict[str, str] = json.load(open("config.json", encoding="UTF-8"))[
-    "ARCHIVE_DIRS"
-]
 
-sources = ["Mail Order", "Mail Service", "Kunden Korrespondenz", "VAK"]
+def run_pipeline(t: datetime, config: dict) -> List[int]:
+    """
+    Runs the whole pipeline for one configuration: reads the input files, loads the
+    missing months into the database and archives the files.
 
-if __name__ == "__main__":
+    Args:
+        t (datetime): The timestamp of the run.
+        config (dict): The configuration, see config.json.
 
-    config_logging()
-    t = datetime.now() - relativedelta(months=1)  # Timestamp
+    Returns:
+        List[int]: The months that have been written to the database.
+    """
+    file_names: Dict[str, str] = config["FILE_NAMES"]
+    input_dirs: Dict[str, str] = config["INPUT_DIRS"]
+    archive_dirs: Dict[str, str] = config["ARCHIVE_DIRS"]
+    tables: Dict[str, str] = config["TABLE_NAMES"]
+    arrow: bool = config["PARAMETER"].get("ARROW", False)
+    normalized: bool = config["PARAMETER"].get("NORMALIZED", False)
+    check_connection_config(config)
 
-    logging.info("Starting file existence check...")
-    check_file_existence(sources=sources, input_dirs=input_dirs, file_names=file_names)
+    logging.info("Scanning input directories...")
+    manifest = scan_inputs(
+        sources,
+        input_dirs,
+        file_names,
+        config["PARAMETER"].get("SETTLE_SECONDS", 60),
+    )
+    check_manifest(manifest)
+    input_files = skip_archived(
+        {source: settled_files(manifest, source) for source in sources},
+        config["ARCHIVE_MANIFEST"],
+        file_hashes(manifest),
+    )
+    for source in sources:
+        if not input_files[source]:
+            logging.info(f"No new file for {source}, nothing to load.")
+            return []
 
     logging.info("Starting database preparations...")
     check_database_connection()
-    create_correspondence(t)
-    create_mail_order(t)
-    create_mail_service(t)
-    create_kpis(t)
+    create_correspondence(t, tables)
+    if normalized:
+        create_dimensions(tables)
+        create_mail_normalized(t, "Mail Order", tables)
+        create_mail_normalized(t, "Mail Service", tables)
+    else:
+        create_mail_order(t, tables)
+        create_mail_service(t, tables)
+    create_vak(t, tables)
+    create_kpis(t, tables)
 
     logging.info("Reading data from files...")
-    month_missing_kpis = determine_missing_kpis(t)
+    month_missing_kpis = determine_missing_kpis(t, tables)
 
-    df_mail_order = read_mail_order(
-        input_dirs["Mail Order"], file_names["Mail Order"], month_missing_kpis
+    # The whole files are read once; the archive keeps all of their rows, the
+    # database only receives the missing months.
+    frames = {
+        "Mail Order": read_mail_order(
+            input_dirs["Mail Order"],
+            file_names["Mail Order"],
+            None,
+            arrow=arrow,
+            files=input_files["Mail Order"],
+        ),
+        "Mail Service": read_mail_service(
+            input_dirs["Mail Service"],
+            file_names["Mail Service"],
+            None,
+            arrow=arrow,
+            files=input_files["Mail Service"],
+        ),
+        "Kunden Korrespondenz": read_correspondence(
+            input_dirs["Kunden Korrespondenz"],
+            file_names["Kunden Korrespondenz"],
+            None,
+            arrow=arrow,
+            files=input_files["Kunden Korrespondenz"],
+        ),
+        "VAK": read_vak(
+            input_dirs["VAK"],
+            file_names["VAK"],
+            None,
+            arrow=arrow,
+            files=input_files["VAK"],
+        ),
+    }
+    df_mail_order = filter_months(
+        frames["Mail Order"], month_missing_kpis, "Mail Order"
     )
-    df_mail_service = read_mail_service(
-        input_dirs["Mail Service"], file_names["Mail Service"], month_missing_kpis
+    df_mail_service = filter_months(
+        frames["Mail Service"], month_missing_kpis, "Mail Service"
     )
-    df_correspondence = read_correspondence(
-        input_dirs["Kunden Korrespondenz"],
-        file_names["Kunden Korrespondenz"],
-        month_missing_kpis,
+    df_correspondence = filter_months(
+        frames["Kunden Korrespondenz"], month_missing_kpis, "Correspondence"
     )
-    df_vak = read_vak(input_dirs["VAK"], file_names["VAK"], month_missing_kpis)
+    df_vak = filter_months(frames["VAK"], month_missing_kpis, "VAK")
 
     available_months = available_data(
         df_mail_order, df_mail_service, df_correspondence, df_vak
@@ -58,14 +116,45 @@ if __name__ == "__main__":
     update_month = list(set(available_months) & set(month_missing_kpis))
     if not update_month:
         logging.info("No data to update in the database.")
-        exit(0)
+        return []
 
     logging.info("Inserting data into database...")
-    upsert_mail_order(t, df_mail_order, update_month)
-    upsert_mail_service(t, df_mail_service, update_month)
-    upsert_correspondence(t, df_correspondence, update_month)
-    upsert_vak(t, df_vak, update_month)
+    if normalized:
+        for source, df in (
+            ("Mail Order", df_mail_order),
+            ("Mail Service", df_mail_service),
+        ):
+            # Only names of loaded rows may end up in the dimension tables
+            df_codes, uniques = factorize_dimensions(
+                filter_months(df, update_month, source)
+            )
+            upsert_mail_normalized(t, source, df_codes, uniques, update_month, tables)
+    else:
+        upsert_mail_order(t, df_mail_order, update_month, tables)
+        upsert_mail_service(t, df_mail_service, update_month, tables)
+    upsert_correspondence(t, df_correspondence, update_month, tables)
+    upsert_vak(t, df_vak, update_month, tables)
+    write_commit_marker(t, update_month, config["COMMIT_MARKER"])
 
     logging.info("Moving files to archive...")
-    move_files(t, sources, input_dirs, archive_dirs, file_names)
+    committed_periods = [f"{t.year}-{m:02d}" for m in committed_months(t, tables)]
+    archive_files(
+        t,
+        sources,
+        input_files,
+        archive_dirs,
+        frames,
+        committed_periods,
+        config["ARCHIVE_MANIFEST"],
+        file_hashes(manifest),
+    )
     logging.info("Process completed successfully.")
+    return update_month
+
+
+if __name__ == "__main__":
+
+    config_logging()
+    t = datetime.now() - relativedelta(months=1)  # Timestamp
+
+    run_pipeline(t, load_config())
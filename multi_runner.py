@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from typing import List
+import argparse
+import json
+import logging
+import os
+import time
+
+from main import run_pipeline
+from utils import config_logging, load_config
+
+TENANT_FORMAT = "%(asctime)s - %(levelname)s - [%(tenant)s] %(message)s"
+
+# The report of the run the current worker thread is processing
+_current_run: ContextVar[dict] = ContextVar("current_run", default=None)
+
+
+class TenantFilter(logging.Filter):
+    """
+    Tags every log record with the team whose run logged it and remembers the last
+    error of the run in its report, as the pipeline stops on errors with `exit`.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        report = _current_run.get()
+        record.tenant = report["tenant"] if report is not None else "-"
+        if report is not None and record.levelno >= logging.ERROR:
+            report["error"] = record.getMessage()
+        return True
+
+
+_tenant_filter = TenantFilter()
+
+
+def run_tenant(t: datetime, config_path: str) -> dict:
+    """
+    Runs the pipeline for one team and records the outcome.
+
+    The pipeline functions stop on errors with `exit`, which only raises SystemExit
+    in the worker thread; it is caught here so the other teams keep running. The exit
+    code and the last error logged by the run are recorded in the report.
+
+    Args:
+        t (datetime): The timestamp of the run.
+        config_path (str): The path of the team's configuration file.
+
+    Returns:
+        dict: The report entry of the team.
+    """
+    tenant = os.path.splitext(os.path.basename(config_path))[0]
+    start = time.perf_counter()
+    report = {"tenant": tenant, "config": config_path, "status": "ok", "months": []}
+    token = _current_run.set(report)
+    logging.info("Starting run")
+    try:
+        config = load_config(config_path)
+        report["tenant"] = config.get("NAME", tenant)
+        report["months"] = sorted(int(m) for m in run_pipeline(t, config))
+    except SystemExit as e:
+        report["exit_code"] = e.code
+        report["status"] = "ok" if e.code in (0, None) else "failed"
+    except Exception as e:
+        logging.error(f"Run failed: {e}")
+        report["status"] = "failed"
+        report["error"] = str(e)
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    logging.info(f"Finished with status {report['status']}")
+    _current_run.reset(token)
+    return report
+
+
+def run_tenants(t: datetime, config_paths: List[str], workers: int = 4) -> List[dict]:
+    """
+    Runs the pipeline for several teams concurrently in one process.
+
+    All runs share the pooled database connections and the holiday calendar, so every
+    team has to use the database of config.json; other databases are rejected.
+
+    Args:
+        t (datetime): The timestamp of the run.
+        config_paths (List[str]): One configuration file per team.
+        workers (int): The maximum number of teams processed at the same time.
+
+    Returns:
+        List[dict]: One report entry per team, in the order of `config_paths`.
+    """
+    logging.getLogger().addFilter(_tenant_filter)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda path: run_tenant(t, path), config_paths))
+
+
+def print_report(reports: List[dict], seconds: float) -> None:
+    """
+    Prints the combined run report.
+    """
+    print(f"{'Tenant':<24}{'Status':<10}{'Seconds':>10}  Months")
+    for report in reports:
+        months = ", ".join(str(m) for m in report["months"]) or "-"
+        print(
+            f"{report['tenant']:<24}{report['status']:<10}{report['seconds']:>10.3f}  {months}"
+        )
+        if "error" in report:
+            print(f"{'':<24}{report['error']}")
+    failed = sum(report["status"] != "ok" for report in reports)
+    print(f"{len(reports)} tenants, {failed} failed, {seconds:.3f} s total")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pipeline for several teams")
+    parser.add_argument("configs", nargs="+", help="configuration file per team")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--report", help="write the run report as JSON to this file")
+    args = parser.parse_args()
+
+    config_logging()
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(_tenant_filter)
+        handler.setFormatter(logging.Formatter(TENANT_FORMAT))
+    t = datetime.now() - relativedelta(months=1)  # Timestamp
+
+    start = time.perf_counter()
+    reports = run_tenants(t, args.configs, args.workers)
+    seconds = time.perf_counter() - start
+
+    print_report(reports, seconds)
+    if args.report:
+        with open(args.report, "w", encoding="UTF-8") as f:
+            json.dump({"seconds": round(seconds, 3), "tenants": reports}, f, indent=4)
+    exit(0 if all(report["status"] == "ok" for report in reports) else 1)
@@ -0,0 +1,225 @@
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+from database_interactions import (
+    COMMIT_MARKER,
+    monthly_aggregates,
+    select_kpis,
+    select_vak_rollup,
+)
+from utils import config_logging
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed time to live.
+
+    Args:
+        maxsize (int): The maximum number of cached results.
+        ttl (float): The time to live of an entry in seconds.
+        clock (callable): The time source, replaceable in tests.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value for `key`, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        """
+        Stores `value` under `key` and evicts the least recently used entry if needed.
+        """
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Removes all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+cache = QueryCache()
+# The generation is increased whenever the cache is cleared, so results of queries
+# running across a commit can be told apart from current ones.
+_marker_state = {"mtime": None, "generation": 0}
+_marker_lock = threading.Lock()
+
+
+def invalidate_on_commit(marker_path: str = COMMIT_MARKER) -> None:
+    """
+    Clears the cache once the pipeline has committed new months, which is signalled
+    by a changed modification time of the commit marker.
+
+    Args:
+        marker_path (str): The path of the commit marker written by the pipeline.
+
+    Returns:
+        None
+    """
+    try:
+        mtime = os.stat(marker_path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _marker_lock:
+        if mtime != _marker_state["mtime"]:
+            if _marker_state["mtime"] is not None:
+                logging.info("New months committed, clearing query cache")
+            cache.clear()
+            _marker_state["mtime"] = mtime
+            _marker_state["generation"] += 1
+
+
+def cached_query(key: tuple, query, marker_path: str = COMMIT_MARKER):
+    """
+    Returns the cached result for `key`, running `query` on a cache miss.
+
+    The result is only cached if no commit happened while the query was running,
+    otherwise it may hold data from before the commit.
+    """
+    invalidate_on_commit(marker_path)
+    result = cache.get(key)
+    if result is None:
+        with _marker_lock:
+            generation = _marker_state["generation"]
+        result = query()
+        invalidate_on_commit(marker_path)
+        with _marker_lock:
+            if _marker_state["generation"] == generation:
+                cache.put(key, result)
+    return result
+
+
+def month_range(params: dict) -> list:
+    """
+    Reads the month range of a request, defaulting to the whole year.
+    """
+    first = int(params.get("from", ["1"])[0])
+    last = int(params.get("to", ["12"])[0])
+    if not 1 <= first <= last <= 12:
+        raise ValueError(f"Invalid month range {first}-{last}")
+    return list(range(first, last + 1))
+
+
+def get_kpis(year: int, months: list) -> list:
+    """
+    Returns the KPI rows of the given year and months.
+    """
+    return cached_query(
+        ("kpis", year, tuple(months)),
+        lambda: select_kpis(datetime(year, 1, 1), months),
+    )
+
+
+def get_aggregates(source: str, year: int, months: list) -> dict:
+    """
+    Returns the monthly aggregates of a source for the given year and months.
+    """
+    if source not in ("Mail Order", "Mail Service", "Kunden Korrespondenz", "VAK"):
+        raise ValueError(f"Unknown source {source}")
+    return cached_query(
+        ("aggregates", source, year, tuple(months)),
+        lambda: monthly_aggregates(datetime(year, 1, 1), source, months),
+    )
+
+
+def get_vak_rollup(rollup: str, year: int, months: list) -> list:
+    """
+    Returns a precomputed VAK rollup for the given year and months.
+    """
+    if rollup not in ("Stunde", "Tag", "Profil"):
+        raise ValueError(f"Unknown rollup {rollup}")
+    return cached_query(
+        ("vak", rollup, year, tuple(months)),
+        lambda: select_vak_rollup(datetime(year, 1, 1), rollup, months),
+    )
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Serves read-only JSON endpoints:
+
+        GET /kpis?year=2024&from=1&to=3
+        GET /aggregates?source=VAK&year=2024&from=1&to=3
+        GET /vak?rollup=Profil&year=2024&from=1&to=3
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        try:
+            year = int(params.get("year", [str(datetime.now().year)])[0])
+            months = month_range(params)
+            if url.path == "/kpis":
+                body = get_kpis(year, months)
+            elif url.path == "/aggregates":
+                body = get_aggregates(params.get("source", [""])[0], year, months)
+            elif url.path == "/vak":
+                body = get_vak_rollup(params.get("rollup", [""])[0], year, months)
+            else:
+                self.send_json(404, {"error": f"Unknown path {url.path}"})
+                return
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logging.error(f"Could not answer query {self.path}: {e}")
+            self.send_json(500, {"error": "Query failed"})
+            return
+        self.send_json(200, body)
+
+    def send_json(self, status: int, body) -> None:
+        data = json.dumps(body, default=str).encode("UTF-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only KPI query service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--ttl", type=float, default=300.0)
+    parser.add_argument("--maxsize", type=int, default=256)
+    args = parser.parse_args()
+
+    config_logging()
+    cache.ttl = args.ttl
+    cache.maxsize = args.maxsize
+    server = ThreadingHTTPServer((args.host, args.port), QueryHandler)
+    logging.info(f"Query service listening on {args.host}:{args.port}")
+    server.serve_forever()
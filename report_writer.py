@@ -0,0 +1,166 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List
+import argparse
+import logging
+
+import pyodbc
+import xlsxwriter
+
+from database_interactions import TABLES, get_db, monthly_aggregates
+from utils import config_logging
+
+FETCH_SIZE = 10000
+EXCEL_EPOCH = datetime(1899, 12, 30)
+ONE_DAY = timedelta(days=1)
+SOURCES = ["Mail Order", "Mail Service", "Kunden Korrespondenz", "VAK"]
+
+
+def excel_value(value):
+    """
+    Converts dates and times to Excel serial numbers and leaves other values as they are.
+
+    This is much cheaper than xlsxwriter's own conversion in `write_datetime`; the
+    number format of the column makes Excel display the value as date or time.
+    """
+    if isinstance(value, datetime):
+        return (value - EXCEL_EPOCH) / ONE_DAY
+    if isinstance(value, date):
+        return (value - EXCEL_EPOCH.date()) / ONE_DAY
+    if isinstance(value, time):
+        return (
+            value.hour * 3600 + value.minute * 60 + value.second
+        ) / 86400 + value.microsecond / 86400e6
+    return value
+
+
+def write_rows(
+    worksheet, header_format, header: List[str], rows, column_formats: list = None
+) -> int:
+    """
+    Writes a header and the rows to a worksheet, row by row.
+
+    In constant-memory mode every row is flushed to disk once the next one is started,
+    so `rows` may be any iterable, e.g. a cursor being fetched in batches.
+
+    Args:
+        worksheet: The xlsxwriter worksheet.
+        header_format: The format of the header row.
+        header (List[str]): The column names.
+        rows: The rows as sequences of values.
+        column_formats (list, optional): The number format per column, None for none.
+
+    Returns:
+        int: The number of rows written, without the header.
+    """
+    for col, column_format in enumerate(column_formats or []):
+        if column_format is not None:
+            worksheet.set_column(col, col, 18, column_format)
+    worksheet.write_row(0, 0, header, header_format)
+    worksheet.freeze_panes(1, 0)
+    count = 0
+    for count, row in enumerate(rows, start=1):
+        worksheet.write_row(count, 0, [excel_value(value) for value in row])
+    return count
+
+
+def stream(cursor: pyodbc.Cursor, sql: str, *params):
+    """
+    Executes a query and yields its rows in batches of FETCH_SIZE, so the result set
+    is never held in memory as a whole.
+    """
+    cursor.execute(sql, *params)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        yield from rows
+
+
+def write_report(
+    t: datetime, output: str, months: List[int], tables: Dict[str, str] = TABLES
+) -> Dict[str, int]:
+    """
+    Writes the monthly management report as xlsx with the sheets "KPIs",
+    "Monatssummen" (the monthly totals per source) and "VAK" (the interval detail).
+
+    The workbook is written in constant-memory mode and the detail rows are streamed
+    straight from the database cursor.
+
+    Args:
+        t (datetime): The timestamp used to generate the table names.
+        output (str): The path of the xlsx file.
+        months (List[int]): The months to report.
+        tables (Dict[str, str]): The table names of the team, defaults to config.json.
+
+    Returns:
+        Dict[str, int]: The number of rows written per sheet.
+    """
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    header_format = workbook.add_format({"bold": True})
+    placeholders = ", ".join("?" for _ in months)
+    month_params = [int(m) for m in months]
+    counts = {}
+
+    cnxn = get_db()
+    cursor = cnxn.cursor()
+    try:
+        kpi_table = tables["KPIS"] + t.strftime("_%Y")
+        cursor.execute(f"SELECT TOP 0 * FROM {kpi_table}")
+        header = [column[0] for column in cursor.description]
+        kpi_rows = (
+            row
+            for row in stream(cursor, f"SELECT * FROM {kpi_table} ORDER BY Zeitstempel")
+            if int(row[0].split("-")[1]) in months
+        )
+        counts["KPIs"] = write_rows(
+            workbook.add_worksheet("KPIs"), header_format, header, kpi_rows
+        )
+
+        totals = {
+            source: monthly_aggregates(t, source, months, tables) for source in SOURCES
+        }
+        counts["Monatssummen"] = write_rows(
+            workbook.add_worksheet("Monatssummen"),
+            header_format,
+            ["Monat"] + SOURCES,
+            (
+                [month] + [totals[source].get(month, 0) for source in SOURCES]
+                for month in months
+            ),
+        )
+
+        vak_table = tables["VAK"] + t.strftime("_%Y")
+        counts["VAK"] = write_rows(
+            workbook.add_worksheet("VAK"),
+            header_format,
+            ["Zeitstempel", "Anzahl", "Durchschnitt"],
+            stream(
+                cursor,
+                f"SELECT Zeitstempel, Anzahl, Durchschnitt FROM {vak_table} WHERE MONTH(Zeitstempel) IN ({placeholders}) ORDER BY Zeitstempel",
+                *month_params,
+            ),
+            [
+                workbook.add_format({"num_format": "dd.mm.yyyy hh:mm"}),
+                None,
+                workbook.add_format({"num_format": "hh:mm:ss"}),
+            ],
+        )
+    finally:
+        cnxn.close()
+        workbook.close()
+
+    logging.info(f"Wrote report {output}: {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the KPI report as xlsx")
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--months", type=int, nargs="+", default=list(range(1, 13)))
+    parser.add_argument("--output", help="defaults to KSC_Report_<year>.xlsx")
+    args = parser.parse_args()
+
+    config_logging()
+    output = args.output or f"KSC_Report_{args.year}.xlsx"
+    counts = write_report(datetime(args.year, 1, 1), output, args.months)
+    print(f"Wrote {output}: {counts}")
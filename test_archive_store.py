@@ -0,0 +1,178 @@
+import unittest
+import os
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import tempfile
+from datetime import datetime
+from archive_store import (
+    archive_file,
+    archive_files,
+    find_archived,
+    load_archived,
+    load_manifest,
+    skip_archived,
+)
+import pandas as pd
+
+
+class TestArchiveStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.archive_dir = os.path.join(self.tmp, "archive_vak")
+        self.manifest = os.path.join(self.tmp, "manifest.json")
+        self.df = pd.DataFrame(
+            {
+                "Zeitstempel": [datetime(2024, 1, 31), datetime(2024, 2, 1)],
+                "Anzahl": [10, 2],
+            }
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write_input(self, name, content=b"KSC_VAK"):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_archive_file(self):
+        # Test case 1: File is moved and recorded with periods and row count
+        input_file = self.write_input("KSC_VAK.xlsx")
+        entry = archive_file(
+            datetime(2024, 3, 3),
+            "VAK",
+            input_file,
+            self.df,
+            self.archive_dir,
+            self.manifest,
+        )
+        self.assertFalse(os.path.exists(input_file))
+        self.assertTrue(os.path.exists(entry["file"]))
+        self.assertTrue(os.path.exists(entry["parquet"]))
+        self.assertEqual(entry["periods"], ["2024-01", "2024-02"])
+        self.assertEqual(entry["rows"], 2)
+
+    def test_archive_file_duplicate(self):
+        # Test case 2: Identical content is only archived once
+        t = datetime(2024, 3, 3)
+        first = archive_file(
+            t,
+            "VAK",
+            self.write_input("KSC_VAK.xlsx"),
+            self.df,
+            self.archive_dir,
+            self.manifest,
+        )
+        second = archive_file(
+            t,
+            "VAK",
+            self.write_input("KSC_VAK.xlsx"),
+            self.df,
+            self.archive_dir,
+            self.manifest,
+        )
+        self.assertEqual(first, second)
+        self.assertEqual(len(load_manifest(self.manifest)), 1)
+
+    def test_load_archived(self):
+        # Test case 3: Only the rows of the requested month are reloaded
+        archive_file(
+            datetime(2024, 3, 3),
+            "VAK",
+            self.write_input("KSC_VAK.xlsx"),
+            self.df,
+            self.archive_dir,
+            self.manifest,
+        )
+        self.assertEqual(len(find_archived("VAK", "2024-02", self.manifest)), 1)
+        self.assertEqual(find_archived("VAK", "2024-03", self.manifest), [])
+        df = load_archived("VAK", "2024-02", self.manifest)
+        self.assertEqual(df["Anzahl"].tolist(), [2])
+
+    def test_skip_archived(self):
+        # Test case 4: Known content is removed before it is loaded again
+        archive_file(
+            datetime(2024, 3, 3),
+            "VAK",
+            self.write_input("KSC_VAK.xlsx"),
+            self.df,
+            self.archive_dir,
+            self.manifest,
+        )
+        redelivered = self.write_input("KSC_VAK_02_2024.xlsx")
+        new = self.write_input("KSC_VAK_03_2024.xlsx", b"KSC_VAK_03")
+        copy = self.write_input("KSC_VAK_03_2024 (1).xlsx", b"KSC_VAK_03")
+        remaining = skip_archived({"VAK": [redelivered, new, copy]}, self.manifest)
+        self.assertEqual(remaining, {"VAK": [new]})
+        self.assertFalse(os.path.exists(redelivered))
+        self.assertFalse(os.path.exists(copy))
+        self.assertTrue(os.path.exists(new))
+
+    def test_archive_file_concurrent(self):
+        # Test case 5: Concurrent runs sharing a manifest keep all entries
+        def archive(i):
+            source_dir = os.path.join(self.tmp, f"team_{i % 2}")
+            os.makedirs(source_dir, exist_ok=True)
+            input_file = os.path.join(source_dir, f"KSC_VAK_{i}.xlsx")
+            with open(input_file, "wb") as f:
+                f.write(f"KSC_VAK_{i}".encode())
+            return archive_file(
+                datetime(2024, 3, 3),
+                "VAK",
+                input_file,
+                self.df,
+                self.archive_dir,
+                self.manifest,
+            )
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(archive, range(40)))
+        self.assertEqual(len(load_manifest(self.manifest)), 40)
+
+    def test_archive_files_pending(self):
+        # Test case 6: Files with months not yet in the database stay in the input
+        january = self.write_input("KSC_VAK_01_2024.xlsx", b"KSC_VAK_01")
+        february = self.write_input("KSC_VAK_02_2024.xlsx", b"KSC_VAK_02")
+        df = pd.concat([self.df.iloc[[0]], self.df.iloc[[1]]], keys=[january, february])
+        archive_files(
+            datetime(2024, 3, 3),
+            ["VAK"],
+            {"VAK": [january, february]},
+            {"VAK": self.archive_dir},
+            {"VAK": df},
+            ["2024-01"],
+            self.manifest,
+        )
+        self.assertFalse(os.path.exists(january))
+        self.assertTrue(os.path.exists(february))
+        self.assertEqual(find_archived("VAK", "2024-02", self.manifest), [])
+
+    def test_archive_files_other_periods(self):
+        # Test case 7: Rows of other years or later months do not keep a file back
+        input_file = self.write_input("KSC_VAK.xlsx")
+        df = pd.DataFrame(
+            {
+                "Zeitstempel": [
+                    datetime(2023, 1, 1),
+                    datetime(2024, 2, 1),
+                    datetime(2024, 4, 1),
+                ],
+                "Anzahl": [10, 2, 4],
+            }
+        )
+        archive_files(
+            datetime(2024, 3, 3),
+            ["VAK"],
+            {"VAK": [input_file]},
+            {"VAK": self.archive_dir},
+            {"VAK": pd.concat([df], keys=[input_file])},
+            ["2024-02"],
+            self.manifest,
+        )
+        self.assertFalse(os.path.exists(input_file))
+        self.assertEqual(len(find_archived("VAK", "2023-01", self.manifest)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
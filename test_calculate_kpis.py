@@ -1,7 +1,9 @@
 import unittest
+from unittest import mock
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from calculate_kpis import get_workdays
+import calculate_kpis
+from calculate_kpis import get_workdays, total_minutes_correspondence
 
 
 class TestGetWorkdays(unittest.TestCase):
@@ -27,5 +29,17 @@ class TestGetWorkdays(unittest.TestCase):
         self.assertEqual(get_workdays(t, months), expected_result)
 
 
+class TestTotalMinutesCorrespondence(unittest.TestCase):
+    def test_total_minutes_correspondence(self):
+        # Test case 1: Minutes of all months are read with one query
+        cnxn = mock.MagicMock()
+        cursor = cnxn.cursor.return_value
+        cursor.fetchall.return_value = [(1, 12), (2, 30), (5, 7)]
+        with mock.patch.object(calculate_kpis, "get_db", return_value=cnxn):
+            result = total_minutes_correspondence(datetime(2024, 3, 1), bz=5)
+        self.assertEqual(result, {1: 60, 2: 150, 3: 0})
+        self.assertEqual(cursor.execute.call_count, 1)
+
+
 if __name__ == "__main__":
     unittest.main()
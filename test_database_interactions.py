@@ -1,6 +1,19 @@
 import unittest
+from unittest import mock
 from datetime import datetime
-from database_interactions import determine_missing_data
+import sqlite3
+import numpy as np
+import database_interactions
+from database_interactions import (
+    TABLES,
+    _refresh_vak_rollups,
+    create_vak,
+    determine_missing_kpis,
+    dimension_keys,
+    monthly_aggregates,
+    remember_dimension_keys,
+    select_vak_rollup,
+)
 
 
 class TestDetermineMissingData(unittest.TestCase):
@@ -8,13 +21,206 @@ class TestDetermineMissingData(unittest.TestCase):
         # Test case 1: No missing months
         t1 = datetime(2024, 1, 1)
         expected_result1 = []
-        self.assertEqual(determine_missing_data(t1), expected_result1)
+        self.assertEqual(determine_missing_kpis(t1), expected_result1)
 
     def test_determine_missing_kpis(self):
         # Test case 1: No missing months
         t1 = datetime(2024, 4, 1)
         expected_result1 = [1, 3, 4]
-        self.assertEqual(determine_missing_data(t1), expected_result1)
+        self.assertEqual(determine_missing_kpis(t1), expected_result1)
+
+
+class TestDimensionKeys(unittest.TestCase):
+    def setUp(self):
+        self.cache = mock.patch.dict(database_interactions._dimension_keys, clear=True)
+        self.cache.start()
+
+    def tearDown(self):
+        self.cache.stop()
+
+    def test_dimension_keys(self):
+        # Test case 1: Missing names are inserted only if absent and cached after commit
+        cursor = mock.MagicMock()
+        cursor.fetchall.side_effect = [[(1, "A")], [(7, "B")]]
+        keys, new_keys = dimension_keys(cursor, "KSC_Kunde", np.array(["B", "A"]))
+        self.assertEqual(keys.tolist(), [7, 1])
+        self.assertEqual(new_keys, {"B": 7})
+        self.assertIn("WHERE NOT EXISTS", cursor.executemany.call_args[0][0])
+        self.assertEqual(cursor.execute.call_args[0][1:], ("B",))
+        self.assertNotIn("B", database_interactions._dimension_keys["KSC_Kunde"])
+
+        remember_dimension_keys("KSC_Kunde", new_keys)
+        cursor.reset_mock()
+        keys, new_keys = dimension_keys(cursor, "KSC_Kunde", np.array(["A", "B"]))
+        self.assertEqual(keys.tolist(), [1, 7])
+        self.assertEqual(new_keys, {})
+        cursor.execute.assert_not_called()
+
+    def test_dimension_keys_lock_released_during_sql(self):
+        # Test case 2: The cache lock is never held while waiting for the database
+        def check_lock(*args):
+            self.assertFalse(database_interactions._dimension_lock.locked())
+
+        cursor = mock.MagicMock()
+        cursor.execute.side_effect = check_lock
+        cursor.executemany.side_effect = check_lock
+        cursor.fetchall.side_effect = [[(1, "A")], [(7, "B")]]
+        keys, _ = dimension_keys(cursor, "KSC_Kunde", np.array(["A", "B"]))
+        self.assertEqual(keys.tolist(), [1, 7])
+        self.assertEqual(cursor.execute.call_count, 2)
+        cursor.executemany.assert_called_once()
+
+
+class TestRefreshVakRollups(unittest.TestCase):
+    def test_refresh_vak_rollups(self):
+        # Test case 1: Only the loaded months are deleted and recomputed in every rollup
+        cursor = mock.MagicMock()
+        _refresh_vak_rollups(cursor, datetime(2024, 3, 1), [2, 3], TABLES)
+
+        statements = [(c[0][0], c[0][1:]) for c in cursor.execute.call_args_list]
+        self.assertEqual(len(statements), 6)
+        for (sql, params), table in zip(
+            statements[::2],
+            ["KSC_VAK_2024_Stunde", "KSC_VAK_2024_Tag", "KSC_VAK_2024_Profil"],
+        ):
+            self.assertTrue(sql.startswith(f"DELETE FROM {table} WHERE"))
+            self.assertIn("IN (?, ?)", sql)
+            self.assertEqual(params, (2, 3))
+        for (sql, params), table in zip(
+            statements[1::2],
+            ["KSC_VAK_2024_Stunde", "KSC_VAK_2024_Tag", "KSC_VAK_2024_Profil"],
+        ):
+            self.assertTrue(sql.startswith(f"INSERT INTO {table} "))
+            self.assertIn("Gewicht", sql)
+            self.assertIn("IN (?, ?)", sql)
+            self.assertEqual(params, (2, 3))
+        self.assertIn(
+            "SUM(CASE WHEN Durchschnitt IS NOT NULL THEN Anzahl END)", statements[1][0]
+        )
+
+    def test_create_vak_rebuilds_outdated_rollups(self):
+        # Test case 2: Rollups without Gewicht are recreated and refilled for the year
+        cnxn = mock.MagicMock()
+        cursor = cnxn.cursor.return_value
+        cursor.fetchone.return_value = (1,)
+        with mock.patch.object(database_interactions, "get_db", return_value=cnxn):
+            create_vak(datetime(2024, 3, 1))
+
+        statements = [c[0][0] for c in cursor.execute.call_args_list]
+        self.assertEqual(sum("DROP TABLE" in sql for sql in statements), 3)
+        self.assertTrue(any("Gewicht int" in sql for sql in statements))
+        self.assertEqual(cursor.execute.call_args[0][1:], tuple(range(1, 13)))
+        cnxn.commit.assert_called_once()
+
+    def test_create_vak_keeps_current_rollups(self):
+        # Test case 3: Current rollups are neither dropped nor refilled
+        cnxn = mock.MagicMock()
+        cursor = cnxn.cursor.return_value
+        cursor.fetchone.return_value = (0,)
+        with mock.patch.object(database_interactions, "get_db", return_value=cnxn):
+            create_vak(datetime(2024, 3, 1))
+
+        statements = [c[0][0] for c in cursor.execute.call_args_list]
+        self.assertFalse(any("DROP TABLE" in sql for sql in statements))
+        self.assertFalse(any(sql.startswith("DELETE") for sql in statements))
+
+
+class SqliteCursor:
+    """
+    Runs the pyodbc-style calls of the module against an in-memory SQLite database.
+    """
+
+    def __init__(self, cnxn):
+        self.cursor = cnxn.cursor()
+
+    def execute(self, sql, *params):
+        return self.cursor.execute(sql, params)
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+
+class TestSelectVakRollup(unittest.TestCase):
+    def test_select_vak_rollup_profil(self):
+        # Test case 1: The profile sums the months and re-weights the mean by volume,
+        # leaving out the volume of intervals without Durchschnitt
+        db = sqlite3.connect(":memory:")
+        db.execute(
+            "CREATE TABLE KSC_VAK_2024_Profil (Monat int, Wochentag int, Stunde int, Anzahl int, Sekunden int, Gewicht int)"
+        )
+        db.executemany(
+            "INSERT INTO KSC_VAK_2024_Profil VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (1, 1, 9, 10, 600, 10),
+                (2, 1, 9, 40, 3600, 30),
+                (3, 1, 9, 50, 50, 50),
+                (2, 2, 8, 0, 0, 0),
+            ],
+        )
+        cnxn = mock.MagicMock()
+        cnxn.cursor.return_value = SqliteCursor(db)
+        with mock.patch.object(database_interactions, "get_db", return_value=cnxn):
+            rows = select_vak_rollup(datetime(2024, 1, 1), "Profil", [1, 2])
+
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "Wochentag": 1,
+                    "Stunde": 9,
+                    "Anzahl": 50,
+                    "Sekunden": 4200,
+                    "Durchschnitt": 105.0,
+                },
+                {
+                    "Wochentag": 2,
+                    "Stunde": 8,
+                    "Anzahl": 0,
+                    "Sekunden": 0,
+                    "Durchschnitt": None,
+                },
+            ],
+        )
+        cnxn.close.assert_called_once()
+
+    def test_select_vak_rollup_tag(self):
+        # Test case 2: Daily rows are read from the daily rollup of the given months
+        cnxn = mock.MagicMock()
+        cursor = cnxn.cursor.return_value
+        cursor.description = [("Tag",), ("Anzahl",), ("Sekunden",), ("Durchschnitt",)]
+        cursor.fetchall.return_value = [(datetime(2024, 2, 1), 4, 240, 60.0)]
+        with mock.patch.object(database_interactions, "get_db", return_value=cnxn):
+            rows = select_vak_rollup(datetime(2024, 1, 1), "Tag", [2])
+
+        sql, *params = cursor.execute.call_args[0]
+        self.assertIn("FROM KSC_VAK_2024_Tag WHERE MONTH(Tag) IN (?)", sql)
+        self.assertEqual(params, [2])
+        self.assertEqual(rows[0]["Sekunden"], 240)
+
+    def test_select_vak_rollup_no_months(self):
+        # Test case 3: No months need no query
+        with mock.patch.object(database_interactions, "get_db") as get_db:
+            self.assertEqual(select_vak_rollup(datetime(2024, 1, 1), "Tag", []), [])
+        get_db.assert_not_called()
+
+
+class TestMonthlyAggregates(unittest.TestCase):
+    def test_monthly_aggregates_vak(self):
+        # Test case 1: VAK is summed from the daily rollup, not the 15-minute intervals
+        cnxn = mock.MagicMock()
+        cursor = cnxn.cursor.return_value
+        cursor.fetchall.return_value = [(2, 120), (3, 80)]
+        with mock.patch.object(database_interactions, "get_db", return_value=cnxn):
+            result = monthly_aggregates(datetime(2024, 1, 1), "VAK", [2, 3])
+
+        sql, *params = cursor.execute.call_args[0]
+        self.assertIn("FROM KSC_VAK_2024_Tag ", sql)
+        self.assertEqual(params, [2, 3])
+        self.assertEqual(result, {2: 120, 3: 80})
 
 
 if __name__ == "__main__":
@@ -1,6 +1,15 @@
 import unittest
+import os
+import tempfile
 from datetime import datetime
-from excel_interactions import available_data
+from excel_interactions import (
+    available_data,
+    factorize_dimensions,
+    filter_months,
+    read_mail_order,
+    read_vak,
+    to_arrow_table,
+)
 import pandas as pd
 
 
@@ -94,5 +103,84 @@ class TestAvailableData(unittest.TestCase):
         )
 
 
+class TestArrowReaders(unittest.TestCase):
+    def test_read_mail_order_arrow(self):
+        # Test case 1: Arrow-backed frame holds the same data as the default one
+        df = read_mail_order(
+            "./input - test/input_mail_order", "schriftliche Aufträge_Mail Order", [2]
+        )
+        df_arrow = read_mail_order(
+            "./input - test/input_mail_order",
+            "schriftliche Aufträge_Mail Order",
+            [2],
+            arrow=True,
+        )
+        self.assertIsInstance(df_arrow["Zeitstempel"].dtype, pd.ArrowDtype)
+        self.assertEqual(
+            to_arrow_table(df_arrow).to_pylist(), to_arrow_table(df).to_pylist()
+        )
+
+    def test_read_vak_arrow(self):
+        # Test case 2: Intervals are cut down to their start in the Arrow backend as well
+        df = read_vak("./input - test/input_vak", "KSC_VAK", [2])
+        df_arrow = read_vak("./input - test/input_vak", "KSC_VAK", [2], arrow=True)
+        self.assertEqual(df_arrow["Zeitstempel"].tolist(), df["Zeitstempel"].tolist())
+
+    def test_read_vak_arrow_blank_row(self):
+        # Test case 3: Blank rows are dropped instead of failing to parse
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "KSC_VAK.xlsx")
+            pd.DataFrame(
+                [
+                    ["Intervall", "bedient", "Bearbeitungszeit"],
+                    ["2024-02-01 14:45-15:00", 2, "00:10:00"],
+                    [None, None, None],
+                    ["2024-02-01 17:00-17:15", 4, "00:10:00"],
+                ]
+            ).to_excel(path, header=False, index=False)
+            df = read_vak(tmp, "KSC_VAK", [2])
+            df_arrow = read_vak(tmp, "KSC_VAK", [2], arrow=True)
+        self.assertEqual(len(df_arrow), 2)
+        self.assertEqual(df_arrow["Zeitstempel"].tolist(), df["Zeitstempel"].tolist())
+
+
+class TestFilterMonths(unittest.TestCase):
+    def test_filter_months(self):
+        # Test case 1: Without months the rows of all months of the file are kept
+        df = read_vak("./input - test/input_vak", "KSC_VAK", None)
+        self.assertEqual(
+            df["Zeitstempel"].dt.strftime("%Y-%m").tolist(),
+            ["2023-01", "2024-02", "2024-02"],
+        )
+        self.assertEqual(len(filter_months(df, [2], "VAK")), 2)
+
+    def test_filter_months_empty(self):
+        # Test case 2: Stops if no data of the selected months is left
+        df = read_vak("./input - test/input_vak", "KSC_VAK", None)
+        with self.assertRaises(SystemExit):
+            filter_months(df, [7], "VAK")
+
+
+class TestFactorizeDimensions(unittest.TestCase):
+    def test_factorize_dimensions(self):
+        # Test case 1: Names are replaced by codes into the distinct names
+        df = pd.DataFrame(
+            {
+                "Kunde": ["Anna", "Bernd ", "Anna", "Bernd"],
+                "Titel": ["Order", "Order", "Kündigung", "Order"],
+                "Zeitstempel": [datetime(2024, 2, d) for d in range(1, 5)],
+            }
+        )
+        df_codes, uniques = factorize_dimensions(df)
+        self.assertEqual(
+            list(df_codes.columns), ["Zeitstempel", "Kunde_Code", "Titel_Code"]
+        )
+        self.assertEqual(uniques["Kunde"].tolist(), ["Anna", "Bernd"])
+        self.assertEqual(df_codes["Kunde_Code"].tolist(), [0, 1, 0, 1])
+        self.assertEqual(
+            uniques["Titel"][df_codes["Titel_Code"]].tolist(), df["Titel"].tolist()
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
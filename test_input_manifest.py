@@ -0,0 +1,64 @@
+import unittest
+import os
+import shutil
+import tempfile
+from input_manifest import infer_period, is_settled, scan_inputs, settled_files
+
+
+class TestInferPeriod(unittest.TestCase):
+    def test_infer_period(self):
+        # Test case 1: Period is taken from the end of the file name
+        self.assertEqual(
+            infer_period("schriftliche Aufträge_Mail Order_02_2024.xlsx"), "2024-02"
+        )
+        self.assertEqual(
+            infer_period("19_02_2024_schriftliche Aufträge_Mail Order_03_2024.xlsx"),
+            "2024-03",
+        )
+
+    def test_infer_period_missing(self):
+        # Test case 2: Names without a period
+        self.assertIsNone(infer_period("KSC_VAK.xlsx"))
+        self.assertIsNone(infer_period("Mail Order_13_2024.xlsx"))
+
+
+class TestScanInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        for name in [
+            "Mail Order_03_2024.xlsx",
+            "Mail Order_02_2024.xlsx",
+            "Mail Order_04_2024.xlsx",
+            "~$Mail Order_04_2024.xlsx",
+            "Mail Order_01_2024.csv",
+        ]:
+            with open(os.path.join(self.tmp, name), "wb") as f:
+                f.write(name.encode())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_scan_inputs(self):
+        # Test case 1: Files are ordered by period, open files are not settled
+        manifest = scan_inputs(
+            ["Mail Order"], {"Mail Order": self.tmp}, {"Mail Order": "Mail Order"}, 0
+        )
+        files = manifest["Mail Order"]
+        self.assertEqual(
+            [f["period"] for f in files], ["2024-02", "2024-03", "2024-04"]
+        )
+        self.assertEqual([f["settled"] for f in files], [True, True, False])
+        self.assertEqual(
+            [os.path.basename(p) for p in settled_files(manifest, "Mail Order")],
+            ["Mail Order_02_2024.xlsx", "Mail Order_03_2024.xlsx"],
+        )
+
+    def test_is_settled(self):
+        # Test case 2: Recently modified files are still being written
+        path = os.path.join(self.tmp, "Mail Order_02_2024.xlsx")
+        self.assertFalse(is_settled(path, 100, 60, now=130))
+        self.assertTrue(is_settled(path, 100, 60, now=160))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from datetime import datetime
+import numpy as np
+from calculate_kpis import personnel_cap
+from kpi_sweep import sweep
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.months = [1, 2]
+        self.totals = {
+            "Kunden Korrespondenz": np.array([12.0, 30.0]),
+            "Mail Order": np.array([100.0, 0.0]),
+            "Mail Service": np.array([50.0, 60.0]),
+            "VAK": np.array([900.0, 1200.0]),
+        }
+        self.workdays = np.array([22, 21])
+
+    def test_sweep_grid(self):
+        # Test case 1: One row per parameter combination and month
+        df = sweep(self.months, self.totals, self.workdays, [4, 5], [2.5], [7.8, 8])
+        self.assertEqual(len(df), 2 * 1 * 2 * 2)
+        row = df[(df["BZ"] == 5) & (df["Stunden_pro_Tag"] == 8) & (df["Monat"] == 2)]
+        self.assertEqual(row["Gesamt_Minuten_Service"].item(), 300)
+        self.assertEqual(row["Gesamt_Minuten_VAK"].item(), 1200)
+        self.assertEqual(row["Personal_Kapazität_Order"].item(), 0.0)
+
+    def test_sweep_matches_personnel_cap(self):
+        # Test case 2: The grid uses the same formula as personnel_cap
+        df = sweep(self.months, self.totals, self.workdays, [5], [2.5], [7.8])
+        row = df[df["Monat"] == 1]
+        self.assertEqual(
+            row["Personal_Kapazität_Order"].item(),
+            personnel_cap(500, datetime(2024, 1, 1), 2.5, 7.8),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import logging
+from unittest import mock
+from datetime import datetime
+import multi_runner
+from database_interactions import check_connection_config
+from utils import load_config
+
+
+class TestRunTenants(unittest.TestCase):
+    def test_run_tenants(self):
+        # Test case 1: A failing team does not stop the other teams
+        def run_pipeline(t, config):
+            if config["NAME"] == "team_b":
+                logging.error("No data available for VAK")
+                exit(1)
+            return [2, 1]
+
+        configs = {"a.json": {"NAME": "team_a"}, "b.json": {"NAME": "team_b"}}
+        with mock.patch.object(
+            multi_runner, "run_pipeline", run_pipeline
+        ), mock.patch.object(multi_runner, "load_config", lambda path: configs[path]):
+            reports = multi_runner.run_tenants(
+                datetime(2024, 2, 1), ["a.json", "b.json"], 2
+            )
+
+        self.assertEqual([r["tenant"] for r in reports], ["team_a", "team_b"])
+        self.assertEqual([r["status"] for r in reports], ["ok", "failed"])
+        self.assertEqual(reports[0]["months"], [1, 2])
+        self.assertNotIn("error", reports[0])
+        self.assertEqual(reports[1]["exit_code"], 1)
+        self.assertEqual(reports[1]["error"], "No data available for VAK")
+
+    def test_tenant_log_records(self):
+        # Test case 2: Log records carry the team of the run that logged them
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logging.getLogger().addHandler(handler)
+        configs = {"a.json": {"NAME": "team_a"}, "b.json": {"NAME": "team_b"}}
+        try:
+            with mock.patch.object(
+                multi_runner,
+                "run_pipeline",
+                lambda t, config: logging.warning(config["NAME"]) or [],
+            ), mock.patch.object(
+                multi_runner, "load_config", lambda path: configs[path]
+            ):
+                multi_runner.run_tenants(datetime(2024, 2, 1), ["a.json", "b.json"], 2)
+        finally:
+            logging.getLogger().removeHandler(handler)
+
+        tagged = [
+            (r.tenant, r.getMessage()) for r in records if r.levelno == logging.WARNING
+        ]
+        self.assertEqual(sorted(tagged), [("team_a", "team_a"), ("team_b", "team_b")])
+
+
+class TestCheckConnectionConfig(unittest.TestCase):
+    def test_check_connection_config(self):
+        # Test case 1: Teams on the database of config.json are accepted
+        config = load_config()
+        check_connection_config(config)
+
+        # Test case 2: Teams on another database are rejected
+        config["DATABASE"] = "other"
+        with self.assertRaises(SystemExit):
+            check_connection_config(config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from unittest import mock
+import json
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+import query_service
+from query_service import (
+    QueryCache,
+    QueryHandler,
+    cached_query,
+    get_vak_rollup,
+    invalidate_on_commit,
+    month_range,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_cache_ttl(self):
+        # Test case 1: Entries expire after their time to live
+        clock = FakeClock()
+        cache = QueryCache(maxsize=2, ttl=10, clock=clock)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        clock.now = 10
+        self.assertIsNone(cache.get("a"))
+
+    def test_cache_lru(self):
+        # Test case 2: The least recently used entry is evicted first
+        cache = QueryCache(maxsize=2, ttl=10, clock=FakeClock())
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+
+class TestInvalidateOnCommit(unittest.TestCase):
+    def test_invalidate_on_commit(self):
+        # Test case 1: A new commit marker clears the cache
+        with tempfile.TemporaryDirectory() as tmp:
+            marker = os.path.join(tmp, "last_commit.json")
+            invalidate_on_commit(marker)
+            query_service.cache.put("kpis", [])
+            invalidate_on_commit(marker)
+            self.assertEqual(query_service.cache.get("kpis"), [])
+            with open(marker, "w") as f:
+                f.write("{}")
+            invalidate_on_commit(marker)
+            self.assertIsNone(query_service.cache.get("kpis"))
+
+    def test_commit_during_query(self):
+        # Test case 2: Results of a query running across a commit are not cached
+        with tempfile.TemporaryDirectory() as tmp:
+            marker = os.path.join(tmp, "last_commit.json")
+
+            def query():
+                with open(marker, "w") as f:
+                    f.write("{}")
+                return "stale"
+
+            self.assertEqual(cached_query(("key",), query, marker), "stale")
+            self.assertIsNone(query_service.cache.get(("key",)))
+            self.assertEqual(cached_query(("key",), lambda: "fresh", marker), "fresh")
+            self.assertEqual(query_service.cache.get(("key",)), "fresh")
+
+
+class TestMonthRange(unittest.TestCase):
+    def test_month_range(self):
+        # Test case 1: Defaults to the whole year
+        self.assertEqual(month_range({}), list(range(1, 13)))
+        self.assertEqual(month_range({"from": ["2"], "to": ["4"]}), [2, 3, 4])
+
+    def test_month_range_invalid(self):
+        # Test case 2: Reversed ranges are rejected
+        with self.assertRaises(ValueError):
+            month_range({"from": ["5"], "to": ["4"]})
+
+
+class TestVakEndpoint(unittest.TestCase):
+    def setUp(self):
+        query_service.cache.clear()
+        self.select = mock.patch.object(
+            query_service,
+            "select_vak_rollup",
+            return_value=[{"Wochentag": 1, "Stunde": 9, "Anzahl": 40}],
+        )
+        self.select_vak_rollup = self.select.start()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), QueryHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.select.stop()
+        query_service.cache.clear()
+
+    def get(self, query):
+        url = f"http://127.0.0.1:{self.server.server_port}/vak?{query}"
+        try:
+            with urllib.request.urlopen(url) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    def test_get_vak_rollup_unknown(self):
+        # Test case 1: Unknown rollups are rejected before querying
+        with self.assertRaises(ValueError):
+            get_vak_rollup("Woche", 2024, [1])
+        self.select_vak_rollup.assert_not_called()
+
+    def test_vak_endpoint(self):
+        # Test case 2: Valid requests are answered from the rollup
+        status, body = self.get("rollup=Profil&year=2024&from=1&to=2")
+        self.assertEqual(status, 200)
+        self.assertEqual(body[0]["Anzahl"], 40)
+        args = self.select_vak_rollup.call_args[0]
+        self.assertEqual(args[1:], ("Profil", [1, 2]))
+        self.assertEqual(args[0].year, 2024)
+
+    def test_vak_endpoint_invalid(self):
+        # Test case 3: Invalid parameters are answered with 400
+        for query in (
+            "rollup=Woche",
+            "year=2024",
+            "rollup=Tag&from=3&to=2",
+            "rollup=Tag&from=0",
+            "rollup=Tag&year=abc",
+        ):
+            status, body = self.get(query)
+            self.assertEqual(status, 400, query)
+            self.assertIn("error", body)
+        self.select_vak_rollup.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from unittest import mock
+import os
+import tempfile
+from datetime import datetime, time
+import openpyxl
+import report_writer
+
+
+class FakeCursor:
+    def __init__(self):
+        self.rows = []
+        self.description = []
+
+    def execute(self, sql, *params):
+        if "KSC_KPIs" in sql:
+            self.description = [("Zeitstempel",), ("Gesamt_Minuten_VAK",)]
+            self.rows = [] if "TOP 0" in sql else [("2024-01", 10), ("2024-02", 20)]
+        else:
+            self.rows = [
+                (datetime(2024, 2, 1, 14, 45), 2, time(0, 10)),
+                (datetime(2024, 2, 1, 17, 0), 4, time(0, 10)),
+            ]
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+class TestWriteReport(unittest.TestCase):
+    def test_write_report(self):
+        # Test case 1: All sheets are written, KPIs are limited to the selected months
+        cnxn = mock.MagicMock()
+        cnxn.cursor.return_value = FakeCursor()
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+            report_writer, "get_db", return_value=cnxn
+        ), mock.patch.object(report_writer, "monthly_aggregates", return_value={2: 6}):
+            output = os.path.join(tmp, "report.xlsx")
+            counts = report_writer.write_report(datetime(2024, 1, 1), output, [2])
+            workbook = openpyxl.load_workbook(output)
+
+            self.assertEqual(counts, {"KPIs": 1, "Monatssummen": 1, "VAK": 2})
+            self.assertEqual(workbook.sheetnames, ["KPIs", "Monatssummen", "VAK"])
+            self.assertEqual(workbook["KPIs"]["A2"].value, "2024-02")
+            self.assertEqual(workbook["Monatssummen"]["B2"].value, 6)
+            self.assertEqual(workbook["VAK"]["A3"].value, datetime(2024, 2, 1, 17, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -35,6 +35,20 @@ def find_matching_file(input_path: str, file_name: str) -> str:
     return matched_files[0]
 
 
+def load_config(path: str = "config.json") -> dict:
+    """
+    Loads a pipeline configuration.
+
+    Args:
+        path (str): The path of the configuration file. Defaults to "config.json".
+
+    Returns:
+        dict: The parsed configuration.
+    """
+    with open(path, encoding="UTF-8") as f:
+        return json.load(f)
+
+
 def config_logging():
     """
     Configures the logging settings.